@@ -2,13 +2,18 @@
 Complete Flask Application
 Integrates: VHD Storage, Network Nodes, Authentication, SkillShare, Admin Panel
 """
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
-from werkzeug.utils import secure_filename
+from flask import Flask, Response, render_template, request, session, redirect, url_for, g
+from flask_compress import Compress
+from functools import partial, wraps
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 import json
 import os
-import io
-from datetime import datetime
+import orjson
+import re
+import threading
+import unicodedata
+import time
 
 # Import all our systems
 from storage_system.vhd_manager import VHDManager
@@ -20,6 +25,18 @@ from auth_system.complete_auth import AuthenticationSystem
 app = Flask(__name__, template_folder='web_interface/templates')
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
 app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024 * 1024  # 1GB max file size
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # Uploads are copied 4MB at a time
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # Downloads are streamed 1MB at a time
+MULTIPART_OVERHEAD = 64 * 1024  # Slack for form boundaries/headers around an upload
+GB = 1024 * 1024 * 1024
+
+# Compress JSON responses (file downloads are octet-stream and left alone)
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
 
 # Initialize all systems
 print("Initializing Cloud Storage System...")
@@ -38,6 +55,98 @@ node_cluster.start_all_nodes()
 
 print("[OK] All systems initialized")
 
+# user_id -> (primary VHD, expires_at) so file routes skip the registry scan
+VHD_CACHE_TTL = 120
+VHD_CACHE_MAXSIZE = 5000
+_vhd_cache: Dict[str, Tuple[Dict, float]] = {}
+_vhd_cache_lock = threading.Lock()
+
+def get_user_vhd(user_id: str) -> Optional[Dict]:
+    """Get the user's primary VHD, cached for VHD_CACHE_TTL seconds"""
+    now = time.monotonic()
+    with _vhd_cache_lock:
+        cached = _vhd_cache.get(user_id)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    user_vhds = vhd_manager.list_vhds(user_id=user_id)
+    if not user_vhds:
+        return None
+
+    cache_user_vhd(user_id, user_vhds[0])
+    return user_vhds[0]
+
+def cache_user_vhd(user_id: str, vhd: Dict):
+    """Remember a user's primary VHD (called on lookup and on VHD create)"""
+    with _vhd_cache_lock:
+        if len(_vhd_cache) >= VHD_CACHE_MAXSIZE and user_id not in _vhd_cache:
+            now = time.monotonic()
+            for uid in [u for u, (_, exp) in _vhd_cache.items() if exp <= now]:
+                del _vhd_cache[uid]
+            if len(_vhd_cache) >= VHD_CACHE_MAXSIZE:
+                _vhd_cache.pop(next(iter(_vhd_cache)))
+        _vhd_cache[user_id] = (vhd, time.monotonic() + VHD_CACHE_TTL)
+
+_FILENAME_RE = re.compile(r'[^A-Za-z0-9._-]+')
+
+def secure_filename(filename: str) -> str:
+    """Reduce an uploaded filename to a safe ASCII name (fast path for werkzeug's)"""
+    ascii_name = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+    return _FILENAME_RE.sub('_', ascii_name).strip('._') or 'file'
+
+def ojsonify(obj, status: int = 200) -> Response:
+    """Build a JSON response with orjson instead of the stdlib encoder"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+# Serialized bodies for read-mostly listings: key -> (version, JSON bytes)
+_json_body_cache: Dict[str, Tuple[object, bytes]] = {}
+
+def cached_json_response(key: str, version, build) -> Response:
+    """Serve a JSON body, rebuilding it only when version changes"""
+    cached = _json_body_cache.get(key)
+    if not cached or cached[0] != version:
+        cached = (version, orjson.dumps(build()))
+        _json_body_cache[key] = cached
+    return Response(cached[1], mimetype='application/json')
+
+@app.before_request
+def load_session_user():
+    """Resolve the session token once per request into `g.user` (None if absent/invalid)"""
+    g.user = None
+    if request.endpoint == 'static':
+        return
+
+    session_token = session.get('session_token')
+    if session_token:
+        g.user = auth_system.validate_session(session_token)
+
+def require_auth(page: bool = False, needs_vhd: bool = False):
+    """
+    Require a valid session (resolved by load_session_user) in `g.user`
+
+    Args:
+        page: Redirect to the login page on failure instead of returning 401 JSON
+        needs_vhd: Also resolve the user's primary VHD into `g.vhd` (None if missing)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            user = g.user
+            if not user:
+                if page:
+                    if 'session_token' in session:
+                        session.clear()
+                    return redirect(url_for('login_page'))
+                if 'session_token' not in session:
+                    return ojsonify({"error": "Not authenticated"}), 401
+                return ojsonify({"error": "Invalid session"}), 401
+
+            if needs_vhd:
+                g.vhd = get_user_vhd(user['user_id'])
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
 # ============================================================================
 # AUTHENTICATION ROUTES
 # ============================================================================
@@ -45,7 +154,7 @@ print("[OK] All systems initialized")
 @app.route('/')
 def index():
     """Landing page"""
-    if 'session_token' in session:
+    if g.user:
         return redirect(url_for('dashboard'))
     return render_template('login.html')
 
@@ -79,24 +188,25 @@ def register_page():
             user_id=result['user_id']
         )
 
+        cache_user_vhd(result['user_id'], user_vhd)
         result['vhd_created'] = True
         result['vhd_id'] = user_vhd['vhd_id']
 
-    return jsonify(result)
+    return ojsonify(result)
 
 @app.route('/api/auth/verify-email', methods=['POST'])
 def api_verify_email():
     """Verify email with OTP"""
     data = request.json
     result = auth_system.verify_email(data['email'], data['otp'])
-    return jsonify(result)
+    return ojsonify(result)
 
 @app.route('/api/auth/resend-otp', methods=['POST'])
 def api_resend_otp():
     """Resend verification OTP"""
     data = request.json
     result = auth_system.resend_verification_otp(data['email'])
-    return jsonify(result)
+    return ojsonify(result)
 
 @app.route('/api/auth/login', methods=['POST'])
 def api_login():
@@ -109,7 +219,7 @@ def api_login():
         session['user_email'] = result['user']['email']
         session['user_id'] = result['user']['user_id']
 
-    return jsonify(result)
+    return ojsonify(result)
 
 @app.route('/api/auth/verify-2fa', methods=['POST'])
 def api_verify_2fa():
@@ -122,7 +232,7 @@ def api_verify_2fa():
         session['user_email'] = result['user']['email']
         session['user_id'] = result['user']['user_id']
 
-    return jsonify(result)
+    return ojsonify(result)
 
 @app.route('/api/auth/logout', methods=['POST'])
 def api_logout():
@@ -130,74 +240,60 @@ def api_logout():
     if 'session_token' in session:
         auth_system.logout(session['session_token'])
         session.clear()
-    return jsonify({"success": True})
+    return ojsonify({"success": True})
 
 @app.route('/api/auth/enable-2fa', methods=['POST'])
 def api_enable_2fa():
     """Enable 2FA"""
     if 'user_email' not in session:
-        return jsonify({"success": False, "error": "Not authenticated"}), 401
+        return ojsonify({"success": False, "error": "Not authenticated"}), 401
 
     result = auth_system.enable_2fa(session['user_email'])
-    return jsonify(result)
+    return ojsonify(result)
 
 @app.route('/api/auth/disable-2fa', methods=['POST'])
 def api_disable_2fa():
     """Disable 2FA"""
     if 'user_email' not in session:
-        return jsonify({"success": False, "error": "Not authenticated"}), 401
+        return ojsonify({"success": False, "error": "Not authenticated"}), 401
 
     result = auth_system.disable_2fa(session['user_email'])
-    return jsonify(result)
+    return ojsonify(result)
 
 # ============================================================================
 # USER DASHBOARD ROUTES
 # ============================================================================
 
 @app.route('/dashboard')
+@require_auth(page=True)
 def dashboard():
     """User dashboard"""
-    if 'session_token' not in session:
-        return redirect(url_for('login_page'))
-
-    # Validate session
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        session.clear()
-        return redirect(url_for('login_page'))
-
-    return render_template('dashboard.html', user=user)
+    return render_template('dashboard.html', user=g.user)
 
 @app.route('/api/nodes', methods=['GET'])
+@require_auth()
 def api_get_nodes():
     """Get cluster nodes status"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
     cluster_status = node_cluster.get_cluster_status()
-    return jsonify(cluster_status)
+    return ojsonify(cluster_status)
 
 @app.route('/api/user/info', methods=['GET'])
+@require_auth()
 def api_user_info():
     """Get current user info"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        return jsonify({"error": "Invalid session"}), 401
+    user = g.user
 
     # Get storage info
     storage = auth_system.get_storage_info(user['email'])
 
-    return jsonify({
+    return ojsonify({
         "user_id": user['user_id'],
         "email": user['email'],
         "full_name": user['full_name'],
         "location": user.get('location', ''),
         "is_2fa_enabled": user['is_2fa_enabled'],
         "storage": storage,
-        "member_since": datetime.fromtimestamp(user['created_at']).strftime('%Y-%m-%d')
+        "member_since": user['created_at_date']
     })
 
 # ============================================================================
@@ -205,34 +301,37 @@ def api_user_info():
 # ============================================================================
 
 @app.route('/api/files/upload', methods=['POST'])
+@require_auth(needs_vhd=True)
 def api_upload_file():
     """Upload a file"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
+    user = g.user
 
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        return jsonify({"error": "Invalid session"}), 401
+    # Reject oversized uploads before werkzeug reads the body
+    storage = auth_system.get_storage_info(user['email'])
+    if request.content_length is None:
+        return ojsonify({"error": "Content-Length required"}), 411
+    if request.content_length - MULTIPART_OVERHEAD > storage['free_bytes']:
+        return ojsonify({"error": "Storage quota exceeded"}), 413
 
     if 'file' not in request.files:
-        return jsonify({"error": "No file provided"}), 400
+        return ojsonify({"error": "No file provided"}), 400
 
     file = request.files['file']
     if file.filename == '':
-        return jsonify({"error": "No file selected"}), 400
+        return ojsonify({"error": "No file selected"}), 400
 
-    # Read file data
-    file_data = file.read()
-    file_size = len(file_data)
+    # Size the upload without reading it into memory
+    file.stream.seek(0, os.SEEK_END)
+    file_size = file.stream.tell()
+    file.stream.seek(0)
 
-    # Check storage quota
-    storage = auth_system.get_storage_info(user['email'])
+    # Exact quota check now that the form is parsed
     if storage['free_bytes'] < file_size:
-        return jsonify({"error": "Storage quota exceeded"}), 400
+        return ojsonify({"error": "Storage quota exceeded"}), 413
 
     # Get user's VHD
-    user_vhds = vhd_manager.list_vhds(user_id=user['user_id'])
-    if not user_vhds:
+    vhd = g.vhd
+    if not vhd:
         # Create VHD if doesn't exist
         vhd = vhd_manager.create_vhd(
             vhd_name=f"Storage_{user['user_id']}",
@@ -240,34 +339,44 @@ def api_upload_file():
             vhd_type="dynamic",
             user_id=user['user_id']
         )
-    else:
-        vhd = user_vhds[0]
+        cache_user_vhd(user['user_id'], vhd)
 
     # Store file in VHD
     try:
         filename = secure_filename(file.filename)
         file_path = f"/files/{filename}"
 
-        file_metadata = vhd_manager.write_file_to_vhd(
+        # Stream into the VHD, teeing each chunk to the primary node
+        with vhd_manager.open_writer(
             vhd_id=vhd['vhd_id'],
             file_path=file_path,
-            file_data=file_data,
-            user_id=user['user_id']
-        )
+            user_id=user['user_id'],
+            max_size=storage['free_bytes']
+        ) as writer:
+            stream = node_cluster.begin_replication(writer.file_id, replication_factor=1)
+            try:
+                for chunk in iter(partial(file.stream.read, UPLOAD_CHUNK_SIZE), b''):
+                    writer.write(chunk)
+                    if stream:
+                        stream.send(chunk)
+                file_metadata = writer.finalize()
+            except Exception:
+                # Includes a failed finalize, so the node never keeps an orphan .bin
+                if stream:
+                    stream.abort()
+                raise
 
         # Replicate to network nodes
-        replication = node_cluster.store_file_with_replication(
-            file_id=file_metadata['file_id'],
-            file_data=file_data,
-            file_metadata=file_metadata,
-            replication_factor=1
-        )
+        if stream:
+            replication = stream.finish(file_metadata)
+        else:
+            replication = {"error": "No primary node"}
 
         # Update user storage usage
-        new_usage = storage['used_bytes'] + file_size
+        new_usage = storage['used_bytes'] + file_metadata['size']
         auth_system.update_storage_usage(user['email'], new_usage)
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "file_id": file_metadata['file_id'],
             "filename": file_metadata['filename'],
@@ -276,140 +385,104 @@ def api_upload_file():
             "message": "File uploaded successfully"
         })
 
+    except ValueError as e:
+        return ojsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 @app.route('/api/files/list', methods=['GET'])
+@require_auth(needs_vhd=True)
 def api_list_files():
     """List user's files"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        return jsonify({"error": "Invalid session"}), 401
+    user = g.user
 
     # Get user's VHD
-    user_vhds = vhd_manager.list_vhds(user_id=user['user_id'])
-    if not user_vhds:
-        return jsonify({"files": []})
+    vhd = g.vhd
+    if not vhd:
+        return ojsonify({"files": []})
 
-    vhd = user_vhds[0]
     files = vhd_manager.list_files_in_vhd(vhd['vhd_id'], user_id=user['user_id'])
 
-    return jsonify({
+    return ojsonify({
         "files": files,
         "count": len(files)
     })
 
 @app.route('/api/files/download/<file_id>', methods=['GET'])
+@require_auth(needs_vhd=True)
 def api_download_file(file_id):
     """Download a file"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        return jsonify({"error": "Invalid session"}), 401
+    user = g.user
 
     # Get user's VHD
-    user_vhds = vhd_manager.list_vhds(user_id=user['user_id'])
-    if not user_vhds:
-        return jsonify({"error": "No files found"}), 404
-
-    vhd = user_vhds[0]
+    vhd = g.vhd
+    if not vhd:
+        return ojsonify({"error": "No files found"}), 404
 
     try:
-        # Read file from VHD
-        file_data = vhd_manager.read_file_from_vhd(vhd['vhd_id'], file_id)
-
-        # Get file metadata
-        files = vhd_manager.list_files_in_vhd(vhd['vhd_id'])
-        file_info = next((f for f in files if f['file_id'] == file_id), None)
-
-        if not file_info:
-            return jsonify({"error": "File not found"}), 404
-
-        # Send file
-        return send_file(
-            io.BytesIO(file_data),
-            mimetype='application/octet-stream',
-            as_attachment=True,
-            download_name=file_info['filename']
-        )
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        reader = vhd_manager.open_reader(vhd['vhd_id'], file_id, user_id=user['user_id'])
+    except ValueError:
+        return ojsonify({"error": "File not found"}), 404
+
+    # Stream straight out of the VHD; memory stays at one chunk
+    response = Response(
+        reader.iter_chunks(DOWNLOAD_CHUNK_SIZE),
+        mimetype='application/octet-stream',
+        headers={
+            'Content-Disposition': f'attachment; filename="{reader.filename}"',
+            'Content-Length': str(reader.size)
+        }
+    )
+    # Close even if the client disconnects before streaming starts
+    response.call_on_close(reader.close)
+    return response
 
 @app.route('/api/files/delete/<file_id>', methods=['DELETE'])
+@require_auth(needs_vhd=True)
 def api_delete_file(file_id):
     """Delete a file"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        return jsonify({"error": "Invalid session"}), 401
+    user = g.user
 
     # Get user's VHD
-    user_vhds = vhd_manager.list_vhds(user_id=user['user_id'])
-    if not user_vhds:
-        return jsonify({"error": "No files found"}), 404
+    vhd = g.vhd
+    if not vhd:
+        return ojsonify({"error": "No files found"}), 404
 
-    vhd = user_vhds[0]
+    # Delete file (the lookup happens inside the delete)
+    success, file_info = vhd_manager.delete_file_from_vhd(vhd['vhd_id'], file_id)
 
-    # Get file info before deletion
-    files = vhd_manager.list_files_in_vhd(vhd['vhd_id'])
-    file_info = next((f for f in files if f['file_id'] == file_id), None)
-
-    if not file_info:
-        return jsonify({"error": "File not found"}), 404
+    if not success:
+        return ojsonify({"error": "File not found"}), 404
 
-    # Delete file
-    success = vhd_manager.delete_file_from_vhd(vhd['vhd_id'], file_id)
-
-    if success:
-        # Update storage usage
-        storage = auth_system.get_storage_info(user['email'])
-        new_usage = storage['used_bytes'] - file_info['size']
-        auth_system.update_storage_usage(user['email'], max(0, new_usage))
+    # Update storage usage
+    storage = auth_system.get_storage_info(user['email'])
+    new_usage = storage['used_bytes'] - file_info['size']
+    auth_system.update_storage_usage(user['email'], max(0, new_usage))
 
-        return jsonify({
-            "success": True,
-            "message": "File deleted successfully"
-        })
-    else:
-        return jsonify({"error": "Failed to delete file"}), 500
+    return ojsonify({
+        "success": True,
+        "message": "File deleted successfully"
+    })
 
 @app.route('/api/files/replicate/<file_id>', methods=['POST'])
+@require_auth(needs_vhd=True)
 def api_replicate_file(file_id):
     """Replicate file to other nodes"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        return jsonify({"error": "Invalid session"}), 401
-
     # Get user's VHD and find file
-    user_vhds = vhd_manager.list_vhds(user_id=user['user_id'])
-    if not user_vhds:
-        return jsonify({"error": "No VHD found"}), 404
+    vhd = g.vhd
+    if not vhd:
+        return ojsonify({"error": "No VHD found"}), 404
 
-    vhd = user_vhds[0]
-    files = vhd_manager.list_files_in_vhd(vhd['vhd_id'])
-    file_info = next((f for f in files if f['file_id'] == file_id), None)
+    file_info = vhd_manager.get_file_info(vhd['vhd_id'], file_id)
 
     if not file_info:
-        return jsonify({"error": "File not found"}), 404
+        return ojsonify({"error": "File not found"}), 404
 
-    # Read file data
-    file_path = vhd_manager.get_file_path(vhd['vhd_id'], file_id, user['user_id'])
+    # Read file data (recently read files come from memory)
     try:
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
+        file_data = vhd_manager.get_file_bytes(vhd['vhd_id'], file_id)
     except Exception as e:
-        return jsonify({"error": f"Error reading file: {str(e)}"}), 500
+        return ojsonify({"error": f"Error reading file: {str(e)}"}), 500
 
     # Replicate to all nodes
     replication = node_cluster.store_file_with_replication(
@@ -419,46 +492,45 @@ def api_replicate_file(file_id):
         replication_factor=3
     )
 
-    return jsonify(replication)
+    return ojsonify(replication)
 
 # ============================================================================
 # SKILLSHARE ROUTES
 # ============================================================================
 
 @app.route('/skillshare')
+@require_auth(page=True)
 def skillshare_page():
     """SkillShare Connect page"""
-    if 'session_token' not in session:
-        return redirect(url_for('login_page'))
     return render_template('skillshare.html')
 
 @app.route('/api/skillshare/teachers', methods=['GET'])
 def api_skillshare_teachers():
     """Get all teachers"""
-    teachers = skillshare.get_all_teachers()
-    return jsonify({"teachers": teachers})
+    return cached_json_response(
+        'skillshare_teachers', len(skillshare.teachers),
+        lambda: {"teachers": skillshare.get_all_teachers()}
+    )
 
 @app.route('/api/skillshare/courses', methods=['GET'])
 def api_skillshare_courses():
     """Get all courses"""
-    courses = skillshare.get_all_courses()
-    return jsonify({"courses": courses})
+    return cached_json_response(
+        'skillshare_courses', len(skillshare.courses),
+        lambda: {"courses": skillshare.get_all_courses()}
+    )
 
 @app.route('/api/skillshare/stats', methods=['GET'])
 def api_skillshare_stats():
     """Get SkillShare statistics"""
     stats = skillshare.get_statistics()
-    return jsonify(stats)
+    return ojsonify(stats)
 
 @app.route('/api/skillshare/booking', methods=['POST'])
+@require_auth()
 def api_skillshare_booking():
     """Create a booking"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        return jsonify({"error": "Invalid session"}), 401
+    user = g.user
 
     data = request.json
     booking = skillshare.create_booking(
@@ -468,32 +540,33 @@ def api_skillshare_booking():
         session_time=data['session_time']
     )
 
-    return jsonify(booking)
+    return ojsonify(booking)
 
 # ============================================================================
 # ADMIN PANEL ROUTES
 # ============================================================================
 
 @app.route('/admin')
+@require_auth(page=True)
 def admin_panel():
     """Admin panel"""
-    if 'session_token' not in session:
-        return redirect(url_for('login_page'))
-
-    user = auth_system.validate_session(session['session_token'])
-    if not user:
-        return redirect(url_for('login_page'))
+    user = g.user
 
     # Check if user is admin (in production, add admin flag to user)
     # For now, first registered user is admin
     return render_template('admin.html', user=user)
 
 @app.route('/api/admin/users', methods=['GET'])
+@require_auth()
 def api_admin_users():
     """Get all users"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
+    return cached_json_response(
+        'admin_users', (auth_system.users_version, len(auth_system.users)),
+        build_admin_users
+    )
 
+def build_admin_users() -> Dict:
+    """Project all users down to their non-sensitive fields"""
     users = auth_system.get_all_users()
 
     # Remove sensitive data
@@ -513,62 +586,75 @@ def api_admin_users():
             "login_count": user.get('login_count', 0)
         })
 
-    return jsonify({"users": safe_users, "count": len(safe_users)})
+    return {"users": safe_users, "count": len(safe_users)}
 
-@app.route('/api/admin/nodes', methods=['GET'])
-def api_admin_nodes():
-    """Get all nodes"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
+# Admin views are polled together; share one snapshot for a couple of seconds
+ADMIN_SNAPSHOT_TTL = 2
+_admin_snapshot: Dict = {"built_at": 0.0, "data": None}
 
-    status = node_cluster.get_cluster_status()
-    return jsonify(status)
-
-@app.route('/api/admin/vhds', methods=['GET'])
-def api_admin_vhds():
-    """Get all VHDs"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    vhds = vhd_manager.list_vhds()
-    return jsonify({"vhds": vhds, "count": len(vhds)})
-
-@app.route('/api/admin/stats', methods=['GET'])
-def api_admin_stats():
-    """Get system statistics"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
+def build_admin_snapshot() -> Dict:
+    """Gather users, VHDs, nodes and stats in one pass (reused for ADMIN_SNAPSHOT_TTL seconds)"""
+    now = time.monotonic()
+    if _admin_snapshot["data"] is not None and now - _admin_snapshot["built_at"] < ADMIN_SNAPSHOT_TTL:
+        return _admin_snapshot["data"]
 
-    users = auth_system.get_all_users()
+    users = build_admin_users()['users']
     vhds = vhd_manager.list_vhds()
     cluster_status = node_cluster.get_cluster_status()
+    aggregates = auth_system.get_user_aggregates()
 
-    total_storage_used = sum(u['storage_used_bytes'] for u in users)
-    total_storage_allocated = sum(u['storage_quota_gb'] * 1024 * 1024 * 1024 for u in users)
+    total_storage_used = aggregates['total_used']
+    total_storage_allocated = aggregates['total_quota_bytes']
 
     stats = {
-        "total_users": len(users),
-        "verified_users": sum(1 for u in users if u['is_verified']),
+        "total_users": aggregates['count'],
+        "verified_users": aggregates['verified_count'],
         "total_vhds": len(vhds),
         "total_nodes": cluster_status['total_nodes'],
         "active_nodes": cluster_status['active_nodes'],
-        "total_storage_allocated_gb": total_storage_allocated / (1024 * 1024 * 1024),
-        "total_storage_used_gb": total_storage_used / (1024 * 1024 * 1024),
+        "total_storage_allocated_gb": total_storage_allocated / GB,
+        "total_storage_used_gb": total_storage_used / GB,
         "storage_usage_percent": (total_storage_used / total_storage_allocated * 100) if total_storage_allocated > 0 else 0
     }
 
-    return jsonify(stats)
+    data = {"users": users, "vhds": vhds, "nodes": cluster_status, "stats": stats}
+    _admin_snapshot["data"] = data
+    _admin_snapshot["built_at"] = now
+    return data
+
+@app.route('/api/admin/snapshot', methods=['GET'])
+@require_auth()
+def api_admin_snapshot():
+    """Get users, VHDs, nodes and stats in one response"""
+    return ojsonify(build_admin_snapshot())
+
+@app.route('/api/admin/nodes', methods=['GET'])
+@require_auth()
+def api_admin_nodes():
+    """Get all nodes"""
+    return ojsonify(build_admin_snapshot()['nodes'])
+
+@app.route('/api/admin/vhds', methods=['GET'])
+@require_auth()
+def api_admin_vhds():
+    """Get all VHDs"""
+    vhds = build_admin_snapshot()['vhds']
+    return ojsonify({"vhds": vhds, "count": len(vhds)})
+
+@app.route('/api/admin/stats', methods=['GET'])
+@require_auth()
+def api_admin_stats():
+    """Get system statistics"""
+    return ojsonify(build_admin_snapshot()['stats'])
 
 # ============================================================================
 # STORAGE NODE INFO ROUTES
 # ============================================================================
 
 @app.route('/api/storage/info', methods=['GET'])
+@require_auth()
 def api_storage_info():
     """Get storage node information"""
-    if 'session_token' not in session:
-        return jsonify({"error": "Not authenticated"}), 401
-
     status = node_cluster.get_cluster_status()
 
     nodes = []
@@ -583,7 +669,7 @@ def api_storage_info():
             "total_size": node_info['statistics']['total_size']
         })
 
-    return jsonify({"nodes": nodes})
+    return ojsonify({"nodes": nodes})
 
 # ============================================================================
 # ERROR HANDLERS
@@ -591,11 +677,11 @@ def api_storage_info():
 
 @app.errorhandler(404)
 def not_found(e):
-    return jsonify({"error": "Not found"}), 404
+    return ojsonify({"error": "Not found"}), 404
 
 @app.errorhandler(500)
 def server_error(e):
-    return jsonify({"error": "Internal server error"}), 500
+    return ojsonify({"error": "Internal server error"}), 500
 
 # ============================================================================
 # MAIN
@@ -614,7 +700,8 @@ if __name__ == '__main__':
     print("  [+] SkillShare Connect")
     print("  [+] Admin Panel")
     print("  [+] 5GB Free Storage per User")
-    print("\nStarting server...")
+    print("\nStarting development server...")
+    print("For production: gunicorn -c gunicorn.conf.py wsgi:app")
     print("="*60)
 
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
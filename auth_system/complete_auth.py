@@ -3,17 +3,55 @@ Complete Authentication System
 Handles user registration, login, OTP verification, 2FA, and email sending
 """
 import os
-import json
+import base64
+import orjson
+import atexit
 import hashlib
+import hmac
 import secrets
 import time
+import threading
+import queue
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 
+# Current password hashing scheme; records without it use legacy salted SHA-256
+PASSWORD_SCHEME = 'pbkdf2_sha256'
+PBKDF2_ITERATIONS = 100_000
+
+# Email templates, filled in with str.format at send time
+VERIFY_EMAIL_SUBJECT = "Verify Your Email - CloudStorage"
+VERIFY_EMAIL_BODY = """Welcome to CloudStorage System!
+
+Hello {full_name},
+
+Thank you for registering. Please verify your email address using this OTP:
+
+Verification Code: {otp}
+
+This code will expire in {minutes} minutes.
+
+If you didn't register for this account, please ignore this email.
+
+Best regards,
+CloudStorage Team"""
+
+RESEND_EMAIL_SUBJECT = "New Verification Code - CloudStorage"
+RESEND_EMAIL_BODY = """Your new verification code is: {otp}
+
+This code will expire in {minutes} minutes."""
+
+LOGIN_EMAIL_SUBJECT = "Login Verification Code - CloudStorage"
+LOGIN_EMAIL_BODY = """Your login verification code is: {otp}
+
+If you didn't try to log in, please secure your account immediately.
+
+This code will expire in {minutes} minutes."""
+
 class AuthenticationSystem:
     """
     Complete authentication system with:
@@ -25,6 +63,13 @@ class AuthenticationSystem:
     - Password hashing
     """
 
+    # Journal store name -> (snapshot file attribute, data attribute)
+    _STORES = {
+        "users": ("users_file", "users"),
+        "sessions": ("sessions_file", "sessions"),
+        "otps": ("otps_file", "active_otps"),
+    }
+
     def __init__(self, data_path: str = "auth_system"):
         self.data_path = Path(data_path)
         self.data_path.mkdir(parents=True, exist_ok=True)
@@ -34,10 +79,28 @@ class AuthenticationSystem:
         self.sessions_file = self.data_path / "sessions.json"
         self.otps_file = self.data_path / "active_otps.json"
 
+        # Mutations are appended to a journal that is folded back into the
+        # three JSON snapshots every `compact_every` entries and at shutdown
+        self.journal_path = self.data_path / "auth_journal.log"
+        self.compact_every = 1000
+        self._journal_entries = 0
+        self._journal_lock = threading.RLock()
+
         # Load data
         self.users = self._load_json(self.users_file, {})
         self.sessions = self._load_json(self.sessions_file, {})
         self.active_otps = self._load_json(self.otps_file, {})
+        self._replay_journal()
+        for user in self.users.values():
+            # Backfill accounts created before created_at_date was stored
+            if 'created_at_date' not in user:
+                user['created_at_date'] = datetime.fromtimestamp(user['created_at']).strftime('%Y-%m-%d')
+        self._journal_file = open(self.journal_path, 'ab', buffering=0)
+        # Fold what was replayed into the snapshots before appending; this
+        # also drops a torn tail line that new entries would land behind
+        if self.journal_path.stat().st_size:
+            self._compact()
+        atexit.register(self._compact)
 
         # Email configuration (will be set via environment variables)
         self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
@@ -46,24 +109,118 @@ class AuthenticationSystem:
         self.smtp_password = os.getenv('SMTP_PASSWORD', '')
         self.from_email = os.getenv('FROM_EMAIL', self.smtp_username)
 
+        # Emails are queued and sent by one worker over a persistent SMTP
+        # connection, NOOPed every `smtp_keepalive_seconds` while idle
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
+        self.smtp_keepalive_seconds = 30
+        self._mail_q: queue.Queue = queue.Queue(maxsize=1000)
+        threading.Thread(target=self._mail_worker, daemon=True).start()
+        threading.Thread(target=self._smtp_keepalive, daemon=True).start()
+        atexit.register(self._flush_mail)
+
         # OTP settings
         self.otp_length = 6
         self.otp_expiry_minutes = 10
 
         # Session settings
         self.session_expiry_hours = 24
+        # last_activity is only updated in memory; the sweeper journals the
+        # sessions touched since its last pass in one batch
+        self._active_sessions: Set[str] = set()
+
+        # Short-lived token -> email cache for validate_session, keyed by the
+        # token's SHA-256 so raw tokens aren't kept around twice
+        self.session_cache_ttl = 30
+        self.session_cache_maxsize = 10000
+        self._session_cache: Dict[bytes, Tuple[str, float]] = {}
+        self._session_cache_by_email: Dict[str, Set[bytes]] = {}
+        self._session_cache_lock = threading.RLock()
+
+        # Bumped on every user change so callers can cache views of self.users
+        self.users_version = 0
+
+        # Running totals for admin stats, kept in step with self.users
+        self._aggregates = self._compute_aggregates()
+
+        # Expired sessions/OTPs are otherwise only dropped when next used
+        self.sweep_seconds = 60
+        threading.Thread(target=self._expiry_sweeper, daemon=True).start()
 
     def _load_json(self, file_path: Path, default_data):
         """Load JSON data from file"""
         if file_path.exists():
-            with open(file_path, 'r') as f:
-                return json.load(f)
+            with open(file_path, 'rb') as f:
+                return orjson.loads(f.read())
         return default_data
 
     def _save_json(self, file_path: Path, data):
-        """Save JSON data to file"""
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Atomically save JSON data to file"""
+        tmp_path = file_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(data))
+        os.replace(tmp_path, file_path)
+
+    def _replay_journal(self):
+        """Apply journaled changes on top of the loaded snapshots"""
+        if not self.journal_path.exists():
+            return
+
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    break  # Torn write at the tail - ignore the rest
+                data = getattr(self, self._STORES[entry['s']][1])
+                if entry['v'] is None:
+                    data.pop(entry['k'], None)
+                else:
+                    data[entry['k']] = entry['v']
+                self._journal_entries += 1
+
+    def _journal(self, store: str, key: str):
+        """Append one record's current value (or its deletion) to the journal"""
+        self._journal_batch([(store, key)])
+
+    def _journal_batch(self, records):
+        """Append several (store, key) records to the journal in a single write"""
+        lines = b"".join(
+            orjson.dumps({"s": store, "k": key,
+                          "v": getattr(self, self._STORES[store][1]).get(key)}) + b"\n"
+            for store, key in records
+        )
+
+        with self._journal_lock:
+            self._journal_file.write(lines)
+            self._journal_entries += len(records)
+
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the JSON snapshots and truncate the journal"""
+        with self._journal_lock:
+            for file_attr, data_attr in self._STORES.values():
+                self._save_json(getattr(self, file_attr), getattr(self, data_attr))
+
+            self._journal_file.truncate(0)
+            self._journal_entries = 0
+
+    def _save_user(self, email: str):
+        """Persist one user and mark cached user views stale"""
+        self._journal("users", email)
+        self.users_version += 1
+
+    def _compute_aggregates(self) -> Dict:
+        """Total up user counts and storage in one pass over self.users"""
+        aggregates = {"count": 0, "verified_count": 0, "total_used": 0, "total_quota_gb": 0}
+        for user in self.users.values():
+            aggregates["count"] += 1
+            aggregates["verified_count"] += 1 if user['is_verified'] else 0
+            aggregates["total_used"] += user['storage_used_bytes']
+            aggregates["total_quota_gb"] += user['storage_quota_gb']
+        return aggregates
 
     def _hash_password(self, password: str, salt: str = None) -> Tuple[str, str]:
         """
@@ -75,24 +232,71 @@ class AuthenticationSystem:
         if salt is None:
             salt = secrets.token_hex(32)
 
-        # Use SHA-256 with salt
-        pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
+        # PBKDF2-HMAC-SHA256 (OpenSSL's hardware-accelerated SHA-256)
+        pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt),
+                                       PBKDF2_ITERATIONS).hex()
 
         return pwd_hash, salt
 
-    def _verify_password(self, password: str, stored_hash: str, salt: str) -> bool:
-        """Verify a password against stored hash"""
-        pwd_hash, _ = self._hash_password(password, salt)
-        return pwd_hash == stored_hash
+    def _verify_password(self, password: str, stored_hash: str, salt: str,
+                         scheme: str = None) -> bool:
+        """Verify a password against stored hash (scheme None = legacy SHA-256)"""
+        if scheme == PASSWORD_SCHEME:
+            pwd_hash, _ = self._hash_password(password, salt)
+        else:
+            pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(pwd_hash, stored_hash)
 
     def _generate_otp(self) -> str:
         """Generate a random OTP"""
-        return ''.join([str(secrets.randbelow(10)) for _ in range(self.otp_length)])
+        # One CSPRNG draw instead of one per digit
+        return f"{secrets.randbelow(10 ** self.otp_length):0{self.otp_length}d}"
 
     def _generate_session_token(self) -> str:
         """Generate a secure session token"""
         return secrets.token_urlsafe(32)
 
+    def _generate_session_tokens_bulk(self, n: int) -> List[str]:
+        """Generate n session tokens from a single entropy draw (bulk test setup)"""
+        raw = os.urandom(32 * n)
+        return [
+            base64.urlsafe_b64encode(raw[i:i + 32]).rstrip(b'=').decode('ascii')
+            for i in range(0, 32 * n, 32)
+        ]
+
+    @staticmethod
+    def _session_cache_key(session_token: str) -> bytes:
+        """Cache key for a session token"""
+        return hashlib.sha256(session_token.encode()).digest()
+
+    def _cache_session(self, session_token: str, email: str, expires_at: float):
+        """Remember a validated session for a few seconds"""
+        key = self._session_cache_key(session_token)
+        now = time.time()
+
+        with self._session_cache_lock:
+            if len(self._session_cache) >= self.session_cache_maxsize:
+                self._session_cache.clear()
+                self._session_cache_by_email.clear()
+
+            self._session_cache[key] = (email, min(now + self.session_cache_ttl, expires_at))
+            self._session_cache_by_email.setdefault(email, set()).add(key)
+
+    def _uncache_session(self, session_token: str):
+        """Drop a single session from the cache"""
+        key = self._session_cache_key(session_token)
+
+        with self._session_cache_lock:
+            cached = self._session_cache.pop(key, None)
+            if cached:
+                self._session_cache_by_email.get(cached[0], set()).discard(key)
+
+    def invalidate_cached_sessions(self, email: str):
+        """Drop every cached session belonging to a user"""
+        with self._session_cache_lock:
+            for key in self._session_cache_by_email.pop(email, set()):
+                self._session_cache.pop(key, None)
+
     def send_email(self, to_email: str, subject: str, body: str,
                    is_html: bool = False) -> bool:
         """
@@ -105,7 +309,7 @@ class AuthenticationSystem:
             is_html: Whether body is HTML
 
         Returns:
-            True if sent successfully
+            True if the email was queued for delivery
         """
         if not self.smtp_username or not self.smtp_password:
             print("⚠ Warning: Email credentials not configured")
@@ -114,31 +318,86 @@ class AuthenticationSystem:
             print(f"   Body: {body}")
             return False
 
-        try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-
-            # Add body
-            if is_html:
-                msg.attach(MIMEText(body, 'html'))
-            else:
-                msg.attach(MIMEText(body, 'plain'))
-
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-
-            print(f"✓ Email sent to {to_email}")
-            return True
+        # Create message
+        msg = MIMEMultipart('alternative')
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
 
-        except Exception as e:
-            print(f"✗ Error sending email: {e}")
+        # Add body
+        if is_html:
+            msg.attach(MIMEText(body, 'html'))
+        else:
+            msg.attach(MIMEText(body, 'plain'))
+
+        try:
+            self._mail_q.put_nowait(msg)
+        except queue.Full:
+            print(f"✗ Email queue full, dropping email to {to_email}")
             return False
+        return True
+
+    def _smtp_connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        server.starttls()
+        server.login(self.smtp_username, self.smtp_password)
+        return server
+
+    def _smtp_close(self):
+        """Drop the pooled SMTP connection (caller holds the lock)"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _smtp_keepalive(self):
+        """Periodically NOOP the pooled connection so the server doesn't drop it"""
+        while True:
+            time.sleep(self.smtp_keepalive_seconds)
+            with self._smtp_lock:
+                if self._smtp is None:
+                    continue
+                try:
+                    self._smtp.noop()
+                except (smtplib.SMTPException, OSError):
+                    self._smtp_close()
+
+    def _smtp_send(self, msg: MIMEMultipart):
+        """Send a message on the pooled connection, reconnecting once if it went stale"""
+        with self._smtp_lock:
+            for attempt in range(2):
+                if self._smtp is None:
+                    self._smtp = self._smtp_connect()
+                try:
+                    self._smtp.send_message(msg)
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    self._smtp = None
+                    if attempt:
+                        raise
+
+    def _mail_worker(self):
+        """Drain the email queue on the pooled SMTP connection"""
+        while True:
+            msg = self._mail_q.get()
+            try:
+                self._smtp_send(msg)
+                print(f"✓ Email sent to {msg['To']}")
+            except Exception as e:
+                print(f"✗ Error sending email: {e}")
+            finally:
+                self._mail_q.task_done()
+
+    def _flush_mail(self, timeout: float = 10):
+        """Give queued emails a chance to go out before the process exits"""
+        deadline = time.time() + timeout
+        while self._mail_q.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+        with self._smtp_lock:
+            self._smtp_close()
 
     def register_user(self, email: str, password: str, full_name: str,
                      location: str = None) -> Dict:
@@ -173,7 +432,8 @@ class AuthenticationSystem:
         verification_otp = self._generate_otp()
 
         # Create user
-        user_id = hashlib.sha256(f"{email}{time.time()}".encode()).hexdigest()[:16]
+        user_id = secrets.token_hex(8)
+        created_at = time.time()
 
         user_data = {
             "user_id": user_id,
@@ -182,18 +442,21 @@ class AuthenticationSystem:
             "location": location,
             "password_hash": pwd_hash,
             "salt": salt,
+            "password_scheme": PASSWORD_SCHEME,
             "is_verified": False,
             "is_2fa_enabled": False,
            "storage_quota_gb": 5,  # 5GB free storage
             "storage_used_bytes": 0,
-            "created_at": time.time(),
+            "created_at": created_at,
+            "created_at_date": datetime.fromtimestamp(created_at).strftime('%Y-%m-%d'),
             "last_login": None,
             "login_count": 0
         }
 
         # Save user
         self.users[email] = user_data
-        self._save_json(self.users_file, self.users)
+        self._aggregates["count"] += 1
+        self._aggregates["total_quota_gb"] += user_data['storage_quota_gb']
 
         # Store OTP
         self.active_otps[email] = {
@@ -202,27 +465,13 @@ class AuthenticationSystem:
             "created_at": time.time(),
             "expires_at": time.time() + (self.otp_expiry_minutes * 60)
         }
-        self._save_json(self.otps_file, self.active_otps)
+        self._journal_batch([("users", email), ("otps", email)])
+        self.users_version += 1
 
         # Send verification email
-        email_body = f"""
-        Welcome to CloudStorage System!
-
-        Hello {full_name},
-
-        Thank you for registering. Please verify your email address using this OTP:
-
-        Verification Code: {verification_otp}
-
-        This code will expire in {self.otp_expiry_minutes} minutes.
-
-        If you didn't register for this account, please ignore this email.
-
-        Best regards,
-        CloudStorage Team
-        """
-
-        self.send_email(email, "Verify Your Email - CloudStorage", email_body.strip())
+        email_body = VERIFY_EMAIL_BODY.format(full_name=full_name, otp=verification_otp,
+                                              minutes=self.otp_expiry_minutes)
+        self.send_email(email, VERIFY_EMAIL_SUBJECT, email_body)
 
         print(f"✓ User registered: {email}")
         print(f"📧 Verification OTP: {verification_otp}")
@@ -257,20 +506,22 @@ class AuthenticationSystem:
         # Check if OTP expired
         if time.time() > otp_data['expires_at']:
             del self.active_otps[email]
-            self._save_json(self.otps_file, self.active_otps)
+            self._journal("otps", email)
             return {"success": False, "error": "Verification code expired. Please request a new one."}
 
         # Verify OTP
-        if otp != otp_data['otp']:
+        if not hmac.compare_digest((otp or '').encode('utf-8'), otp_data['otp'].encode('utf-8')):
             return {"success": False, "error": "Invalid verification code"}
 
         # Mark user as verified
+        if not self.users[email]['is_verified']:
+            self._aggregates["verified_count"] += 1
         self.users[email]['is_verified'] = True
-        self._save_json(self.users_file, self.users)
 
         # Remove used OTP
         del self.active_otps[email]
-        self._save_json(self.otps_file, self.active_otps)
+        self._journal_batch([("users", email), ("otps", email)])
+        self.users_version += 1
 
         print(f"✓ Email verified: {email}")
 
@@ -297,16 +548,11 @@ class AuthenticationSystem:
             "created_at": time.time(),
             "expires_at": time.time() + (self.otp_expiry_minutes * 60)
         }
-        self._save_json(self.otps_file, self.active_otps)
+        self._journal("otps", email)
 
         # Send email
-        email_body = f"""
-        Your new verification code is: {verification_otp}
-
-        This code will expire in {self.otp_expiry_minutes} minutes.
-        """
-
-        self.send_email(email, "New Verification Code - CloudStorage", email_body.strip())
+        email_body = RESEND_EMAIL_BODY.format(otp=verification_otp, minutes=self.otp_expiry_minutes)
+        self.send_email(email, RESEND_EMAIL_SUBJECT, email_body)
 
         print(f"✓ Verification OTP resent: {email}")
         print(f"📧 New OTP: {verification_otp}")
@@ -336,9 +582,16 @@ class AuthenticationSystem:
         user = self.users[email]
 
         # Verify password
-        if not self._verify_password(password, user['password_hash'], user['salt']):
+        if not self._verify_password(password, user['password_hash'], user['salt'],
+                                     user.get('password_scheme')):
             return {"success": False, "error": "Invalid email or password"}
 
+        # Upgrade legacy SHA-256 hashes now that we have the plaintext
+        if user.get('password_scheme') != PASSWORD_SCHEME:
+            user['password_hash'], user['salt'] = self._hash_password(password)
+            user['password_scheme'] = PASSWORD_SCHEME
+            self._save_user(email)
+
         # Check if email is verified
         if not user['is_verified']:
             return {
@@ -358,18 +611,11 @@ class AuthenticationSystem:
                 "created_at": time.time(),
                 "expires_at": time.time() + (self.otp_expiry_minutes * 60)
             }
-            self._save_json(self.otps_file, self.active_otps)
+            self._journal("otps", email)
 
             # Send 2FA email
-            email_body = f"""
-            Your login verification code is: {login_otp}
-
-            If you didn't try to log in, please secure your account immediately.
-
-            This code will expire in {self.otp_expiry_minutes} minutes.
-            """
-
-            self.send_email(email, "Login Verification Code - CloudStorage", email_body.strip())
+            email_body = LOGIN_EMAIL_BODY.format(otp=login_otp, minutes=self.otp_expiry_minutes)
+            self.send_email(email, LOGIN_EMAIL_SUBJECT, email_body)
 
             print(f"📧 2FA OTP sent to: {email}")
             print(f"🔐 2FA OTP: {login_otp}")
@@ -391,12 +637,12 @@ class AuthenticationSystem:
             "expires_at": time.time() + (self.session_expiry_hours * 3600),
             "last_activity": time.time()
         }
-        self._save_json(self.sessions_file, self.sessions)
 
         # Update user login info
         user['last_login'] = time.time()
         user['login_count'] += 1
-        self._save_json(self.users_file, self.users)
+        self._journal_batch([("sessions", session_token), ("users", email)])
+        self.users_version += 1
 
         print(f"✓ User logged in: {email}")
 
@@ -429,16 +675,15 @@ class AuthenticationSystem:
         # Check expiry
         if time.time() > otp_data['expires_at']:
             del self.active_otps[email]
-            self._save_json(self.otps_file, self.active_otps)
+            self._journal("otps", email)
             return {"success": False, "error": "Verification code expired"}
 
         # Verify OTP
-        if otp != otp_data['otp']:
+        if not hmac.compare_digest((otp or '').encode('utf-8'), otp_data['otp'].encode('utf-8')):
             return {"success": False, "error": "Invalid verification code"}
 
         # Remove used OTP
         del self.active_otps[email]
-        self._save_json(self.otps_file, self.active_otps)
 
         # Create session
         user = self.users[email]
@@ -451,12 +696,12 @@ class AuthenticationSystem:
             "expires_at": time.time() + (self.session_expiry_hours * 3600),
             "last_activity": time.time()
         }
-        self._save_json(self.sessions_file, self.sessions)
 
         # Update user login info
         user['last_login'] = time.time()
         user['login_count'] += 1
-        self._save_json(self.users_file, self.users)
+        self._journal_batch([("otps", email), ("sessions", session_token), ("users", email)])
+        self.users_version += 1
 
         print(f"✓ 2FA verified and user logged in: {email}")
 
@@ -480,6 +725,13 @@ class AuthenticationSystem:
         Returns:
             User data if valid, None otherwise
         """
+        cached = self._session_cache.get(self._session_cache_key(session_token))
+        if cached and time.time() < cached[1]:
+            session = self.sessions.get(session_token)
+            if session:
+                self._touch_session(session_token, session)
+            return self.users.get(cached[0])
+
         if session_token not in self.sessions:
             return None
 
@@ -488,25 +740,63 @@ class AuthenticationSystem:
         # Check expiry
         if time.time() > session['expires_at']:
             del self.sessions[session_token]
-            self._save_json(self.sessions_file, self.sessions)
+            self._journal("sessions", session_token)
             return None
 
-        # Update last activity
-        session['last_activity'] = time.time()
-        self._save_json(self.sessions_file, self.sessions)
+        self._touch_session(session_token, session)
 
         # Return user data
         email = session['email']
         if email in self.users:
+            self._cache_session(session_token, email, session['expires_at'])
             return self.users[email]
 
         return None
 
+    def _touch_session(self, session_token: str, session: Dict):
+        """Record session activity in memory; flush_session_activity persists it"""
+        session['last_activity'] = time.time()
+        self._active_sessions.add(session_token)
+
+    def flush_session_activity(self) -> int:
+        """Journal last_activity for every session touched since the last flush"""
+        touched, self._active_sessions = self._active_sessions, set()
+        records = [("sessions", token) for token in touched if token in self.sessions]
+        if records:
+            self._journal_batch(records)
+        return len(records)
+
+    def prune_expired(self) -> Dict:
+        """Drop expired sessions and OTPs, returning how many of each were removed"""
+        now = time.time()
+
+        dead_sessions = [token for token, s in list(self.sessions.items()) if now > s['expires_at']]
+        for session_token in dead_sessions:
+            self._uncache_session(session_token)
+            if self.sessions.pop(session_token, None) is not None:
+                self._journal("sessions", session_token)
+
+        dead_otps = [email for email, o in list(self.active_otps.items()) if now > o['expires_at']]
+        for email in dead_otps:
+            if self.active_otps.pop(email, None) is not None:
+                self._journal("otps", email)
+
+        return {"sessions": len(dead_sessions), "otps": len(dead_otps)}
+
+    def _expiry_sweeper(self):
+        """Periodically prune expired sessions and OTPs and persist session activity"""
+        while True:
+            time.sleep(self.sweep_seconds)
+            self.prune_expired()
+            self.flush_session_activity()
+
     def logout(self, session_token: str) -> bool:
         """Log out a user"""
+        self._uncache_session(session_token)
+
         if session_token in self.sessions:
             del self.sessions[session_token]
-            self._save_json(self.sessions_file, self.sessions)
+            self._journal("sessions", session_token)
             print(f"✓ User logged out")
             return True
         return False
@@ -517,7 +807,8 @@ class AuthenticationSystem:
             return {"success": False, "error": "User not found"}
 
         self.users[email]['is_2fa_enabled'] = True
-        self._save_json(self.users_file, self.users)
+        self._save_user(email)
+        self.invalidate_cached_sessions(email)
 
         print(f"✓ 2FA enabled for: {email}")
 
@@ -529,7 +820,8 @@ class AuthenticationSystem:
             return {"success": False, "error": "User not found"}
 
         self.users[email]['is_2fa_enabled'] = False
-        self._save_json(self.users_file, self.users)
+        self._save_user(email)
+        self.invalidate_cached_sessions(email)
 
         print(f"✓ 2FA disabled for: {email}")
 
@@ -543,13 +835,25 @@ class AuthenticationSystem:
         """Get all users (for admin)"""
         return list(self.users.values())
 
+    def get_user_aggregates(self) -> Dict:
+        """Get user count, verified count, total bytes used and total quota bytes"""
+        aggregates = self._aggregates
+        return {
+            "count": aggregates["count"],
+            "verified_count": aggregates["verified_count"],
+            "total_used": aggregates["total_used"],
+            "total_quota_bytes": aggregates["total_quota_gb"] * 1024 * 1024 * 1024
+        }
+
     def update_storage_usage(self, email: str, bytes_used: int) -> bool:
         """Update user's storage usage"""
         if email not in self.users:
             return False
 
+        self._aggregates["total_used"] += bytes_used - self.users[email]['storage_used_bytes']
         self.users[email]['storage_used_bytes'] = bytes_used
-        self._save_json(self.users_file, self.users)
+        self._save_user(email)
+        self.invalidate_cached_sessions(email)
         return True
 
     def get_storage_info(self, email: str) -> Optional[Dict]:
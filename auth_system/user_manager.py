@@ -1,13 +1,77 @@
-import json
 import os
+import orjson
+import atexit
+import mmap
+import hmac
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Mapping, List, Iterable, Tuple
 from datetime import datetime
 import secrets
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+import queue
+import re
+from email.message import EmailMessage
+
+# Argon2id for new hashes; legacy bcrypt hashes are upgraded on login.
+# Defaults (t=3, m=64MiB, p=2) can be tuned per host via the environment.
+_password_hasher = PasswordHasher(
+    time_cost=int(os.environ.get("ARGON2_TIME_COST", "3")),
+    memory_cost=int(os.environ.get("ARGON2_MEMORY_COST", "65536")),
+    parallelism=int(os.environ.get("ARGON2_PARALLELISM", "2"))
+)
+
+OTP_EMAIL_SUBJECT = "Your Cloud Storage Login OTP"
+OTP_EMAIL_BODY = """
+Hello {username},
+
+Your One-Time Password (OTP) for logging into Cloud Storage System is:
+
+{otp}
+
+This OTP is valid for 5 minutes.
+
+If you did not request this, please ignore this email.
+
+Best regards,
+Cloud Storage System Team
+"""
+
+# One '@', no whitespace, and at least one dot in the domain part
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+# Modular-crypt prefix shared by all bcrypt variants ($2a$, $2b$, $2y$)
+_BCRYPT_PREFIX = '$2'
+
+
+def _kdf_hash(password: str) -> str:
+    """Hash a password using Argon2id (runs in the KDF worker pool)"""
+    return _password_hasher.hash(password)
+
+
+def _kdf_warmup() -> None:
+    """Load the native bcrypt/argon2 modules so the first real login doesn't pay for it"""
+    bcrypt.checkpw(b"warm", bcrypt.hashpw(b"warm", bcrypt.gensalt(4)))
+    _password_hasher.verify(_password_hasher.hash("warm"), "warm")
+
+
+def _kdf_verify(password: str, hashed: str) -> bool:
+    """Check a password against an Argon2id or legacy bcrypt hash (runs in the KDF worker pool)"""
+    if hashed.startswith(_BCRYPT_PREFIX):
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+    try:
+        return _password_hasher.verify(hashed, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
 
 class UserManager:
     """Manages user accounts and authentication with email OTP"""
@@ -16,7 +80,38 @@ class UserManager:
                  email_config: Optional[Dict] = None):
         self.users_db_path = Path(users_db_path)
         self.users_db_path.parent.mkdir(exist_ok=True)
-        self.users = self._load_users()
+
+        # Writes go to an append-only journal that is folded back into the
+        # JSON snapshot every `compact_every` entries and at shutdown
+        self.journal_path = self.users_db_path.with_suffix('.log')
+        self.compact_every = 1000
+        self._journal_entries = 0
+
+        # `users` and `_email_index` are copy-on-write: writers build a new
+        # dict under `_users_lock` and swap the reference, so readers never
+        # lock and never see a dict that is being mutated
+        self._users_lock = threading.RLock()
+        self.users: Dict[str, Dict] = self._load_users()
+        self._email_index = {u['email']: name for name, u in self.users.items()}
+        # username -> (record the view was built from, view)
+        self._safe_views: Dict[str, Tuple[Dict, Mapping]] = {}
+        self._journal = open(self.journal_path, 'ab', buffering=0)
+        # Fold what was replayed into the snapshot before appending; this
+        # also drops a torn tail line that new entries would land behind
+        if self.journal_path.stat().st_size:
+            self._compact()
+        atexit.register(self._compact)
+
+        # Password hashing runs in worker processes so the request thread
+        # isn't holding the GIL for the whole KDF. The workers are forked on
+        # the first submit, so the pool is created and warmed before this
+        # object starts any threads of its own
+        self._kdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        atexit.register(self._kdf_pool.shutdown)
+
+        # Warm every worker in the background
+        for _ in range(os.cpu_count() or 1):
+            self._kdf_pool.submit(_kdf_warmup)
 
         # Email configuration (prefer explicit `email_config`; otherwise read from environment)
         if email_config:
@@ -29,82 +124,201 @@ class UserManager:
                 "app_password": os.environ.get("SMTP_APP_PASSWORD", "")
             }
 
-        # OTP storage (in-memory for now)
+        # OTP storage (in-memory for now); expired entries are evicted lazily
+        # on lookup and by a periodic sweep
         self.active_otps: Dict[str, Dict] = {}
+        self.otp_ttl_seconds = 300  # 5 minutes
+        self.otp_sweep_seconds = 60
+        threading.Thread(target=self._otp_sweeper, daemon=True).start()
+
+        # Persistent SMTP connection, opened on first send and kept alive
+        # with NOOPs so each OTP skips the TCP + STARTTLS + AUTH handshake
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
+        self.smtp_keepalive_seconds = 60
+        threading.Thread(target=self._smtp_keepalive, daemon=True).start()
+
+        # OTP emails are handed to a sender thread so login doesn't wait on SMTP
+        self._mail_q: queue.Queue = queue.Queue()
+        threading.Thread(target=self._mail_worker, daemon=True).start()
+
+        # Cache of recent password checks, keyed by a keyed HMAC so no
+        # plaintext password is ever held in memory
+        self._verify_cache: OrderedDict = OrderedDict()
+        self._verify_cache_size = 1024
+        self._verify_cache_lock = threading.Lock()
+        self._cache_secret = secrets.token_bytes(32)
 
     def _load_users(self) -> Dict:
-        """Load users from JSON database"""
-        if self.users_db_path.exists():
-            with open(self.users_db_path, 'r') as f:
-                return json.load(f)
-        return {}
-
-    def _save_users(self):
-        """Save users to JSON database"""
-        with open(self.users_db_path, 'w') as f:
-            json.dump(self.users, f, indent=2)
+        """Load users from the JSON snapshot, then replay the journal"""
+        users = {}
+        if self.users_db_path.exists() and self.users_db_path.stat().st_size > 0:
+            # Parse straight out of the page cache instead of copying the file
+            # into a bytes object first
+            with open(self.users_db_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    users = orjson.loads(view)
+
+        if self.journal_path.exists():
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        break  # Torn write at the tail - ignore the rest
+                    if entry['op'] == 'upsert':
+                        users[entry['u']] = entry['v']
+                    self._journal_entries += 1
+
+        return users
+
+    def _commit_user(self, username: str, record: Dict):
+        """Publish a new record for a user and journal it (caller holds _users_lock)"""
+        self._commit_users({username: record})
+
+    def _commit_users(self, records: Dict[str, Dict]):
+        """Publish new records for several users in one swap (caller holds _users_lock)"""
+        self.users = {**self.users, **records}
+        new_emails = {r['email']: name for name, r in records.items()
+                      if self._email_index.get(r['email']) != name}
+        if new_emails:
+            self._email_index = {**self._email_index, **new_emails}
+        self._journal_users(list(records))
+
+    def _journal_user(self, username: str):
+        """Append a single user's record to the journal"""
+        self._journal_users([username])
+
+    def _journal_users(self, usernames: List[str]):
+        """Append several users' records to the journal in one write"""
+        lines = []
+        for username in usernames:
+            entry = {"op": "upsert", "u": username, "v": self.users[username]}
+            lines.append(orjson.dumps(entry) + b"\n")
+        self._journal.write(b"".join(lines))
+        self._journal_entries += len(lines)
+
+        if self._journal_entries >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        """Atomically rewrite the JSON snapshot and truncate the journal"""
+        with self._users_lock:
+            tmp_path = self.users_db_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(self.users, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_path, self.users_db_path)
+
+            self._journal.truncate(0)
+            self._journal_entries = 0
 
     def _hash_password(self, password: str) -> str:
-        """Hash a password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Hash a password using Argon2id"""
+        return self._kdf_pool.submit(_kdf_hash, password).result()
+
+    def _needs_rehash(self, hashed: str) -> bool:
+        """Check if a stored hash is legacy bcrypt or uses outdated Argon2 params"""
+        if hashed.startswith(_BCRYPT_PREFIX):
+            return True
+        return _password_hasher.check_needs_rehash(hashed)
 
     def _verify_password(self, password: str, hashed: str) -> bool:
-        """Verify a password against its hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        """Verify a password against its hash (repeat checks skip the KDF)"""
+        key = hmac.new(self._cache_secret,
+                       password.encode('utf-8') + b"|" + hashed.encode('utf-8'),
+                       'sha256').digest()
+
+        with self._verify_cache_lock:
+            cached = self._verify_cache.get(key)
+            if cached is not None:
+                self._verify_cache.move_to_end(key)
+                return cached
+
+        # The KDF runs outside the lock so concurrent logins don't queue on it
+        result = self._kdf_pool.submit(_kdf_verify, password, hashed).result()
+
+        with self._verify_cache_lock:
+            self._verify_cache[key] = result
+            if len(self._verify_cache) > self._verify_cache_size:
+                self._verify_cache.popitem(last=False)
+
+        return result
+
+    def _smtp_connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection"""
+        server = smtplib.SMTP(self.email_config['smtp_server'],
+                              self.email_config['smtp_port'])
+        server.ehlo()
+        server.starttls()
+        server.ehlo()
+        server.login(self.email_config['from_email'],
+                     self.email_config['app_password'])
+        return server
+
+    def _smtp_close(self):
+        """Drop the pooled SMTP connection (caller holds the lock)"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _smtp_keepalive(self):
+        """Periodically NOOP the pooled connection so the server doesn't drop it"""
+        while True:
+            time.sleep(self.smtp_keepalive_seconds)
+            with self._smtp_lock:
+                if self._smtp is None:
+                    continue
+                try:
+                    self._smtp.noop()
+                except (smtplib.SMTPException, OSError):
+                    self._smtp_close()
+
+    def _smtp_send(self, msg: EmailMessage):
+        """Send a message on the pooled connection, reconnecting once if it went stale"""
+        with self._smtp_lock:
+            for attempt in range(2):
+                if self._smtp is None:
+                    self._smtp = self._smtp_connect()
+                try:
+                    self._smtp.send_message(msg)
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    self._smtp = None
+                    if attempt:
+                        raise
+
+    def _mail_worker(self):
+        """Drain the OTP email queue on the pooled SMTP connection"""
+        while True:
+            to_email, otp, username = self._mail_q.get()
+            self._send_otp_email(to_email, otp, username)
+            self._mail_q.task_done()
 
     def _send_otp_email(self, to_email: str, otp: str, username: str) -> bool:
         """Send OTP via email"""
         try:
-            # Create email message
-            subject = "Your Cloud Storage Login OTP"
-            body = f"""
-Hello {username},
-
-Your One-Time Password (OTP) for logging into Cloud Storage System is:
-
-{otp}
-
-This OTP is valid for 5 minutes.
-
-If you did not request this, please ignore this email.
-
-Best regards,
-Cloud Storage System Team
-            """
-
-            msg = MIMEMultipart()
+            msg = EmailMessage()
             msg['From'] = self.email_config['from_email']
             msg['To'] = to_email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'plain'))
+            msg['Subject'] = OTP_EMAIL_SUBJECT
+            msg.set_content(OTP_EMAIL_BODY.format(username=username, otp=otp))
 
             # Send email
             print(f"📧 Attempting to send email to {to_email}...")
-            with smtplib.SMTP(self.email_config['smtp_server'],
-                            self.email_config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.email_config['from_email'],
-                           self.email_config['app_password'])
-                server.send_message(msg)
-                print(f"✅ Email sent successfully to {to_email}")
-                return True
+            self._smtp_send(msg)
+            print(f"✅ Email sent successfully to {to_email}")
+            return True
 
         except Exception as e:
             print(f"❌ Failed to send email: {e}")
             return False
 
-    def register_user(self, username: str, email: str, password: str) -> Dict:
-        """
-        Register a new user
-
-        Args:
-            username: Unique username
-            email: User's email address
-            password: Plain text password (will be hashed)
-
-        Returns:
-            Dict with status and message
-        """
+    def _validate_registration(self, username: str, email: str, password: str) -> Optional[Dict]:
+        """Check a registration request, returning an error dict or None if valid"""
         # Validate username
         if username in self.users:
             return {
@@ -112,20 +326,19 @@ Cloud Storage System Team
                 "message": "Username already exists"
             }
 
-        # Validate email format (basic check)
-        if '@' not in email or '.' not in email:
+        # Validate email format
+        if not _EMAIL_RE.fullmatch(email or ''):
             return {
                 "status": "error",
                 "message": "Invalid email format"
             }
 
         # Check if email already registered
-        for user_data in self.users.values():
-            if user_data['email'] == email:
-                return {
-                    "status": "error",
-                    "message": "Email already registered"
-                }
+        if email in self._email_index:
+            return {
+                "status": "error",
+                "message": "Email already registered"
+            }
 
         # Validate password strength
         if len(password) < 6:
@@ -134,9 +347,27 @@ Cloud Storage System Team
                 "message": "Password must be at least 6 characters"
             }
 
+        return None
+
+    def register_user(self, username: str, email: str, password: str) -> Dict:
+        """
+        Register a new user
+
+        Args:
+            username: Unique username
+            email: User's email address
+            password: Plain text password (will be hashed)
+
+        Returns:
+            Dict with status and message
+        """
+        error = self._validate_registration(username, email, password)
+        if error:
+            return error
+
         # Create user
         user_id = f"user_{secrets.token_hex(8)}"
-        self.users[username] = {
+        record = {
             "user_id": user_id,
             "username": username,
             "email": email,
@@ -146,7 +377,13 @@ Cloud Storage System Team
             "verified": False
         }
 
-        self._save_users()
+        with self._users_lock:
+            # Re-check now that we hold the lock; another registration may
+            # have landed while the password was hashing
+            error = self._validate_registration(username, email, password)
+            if error:
+                return error
+            self._commit_user(username, record)
 
         print(f"✅ User '{username}' registered successfully with ID: {user_id}")
 
@@ -156,41 +393,128 @@ Cloud Storage System Team
             "user_id": user_id
         }
 
+    def register_users_bulk(self, users: Iterable[Tuple[str, str, str]]) -> List[Dict]:
+        """
+        Register many users at once (e.g. a migration or seed import)
+
+        Passwords are hashed in parallel across the KDF worker pool and all
+        accepted users are committed in a single swap and journal write.
+
+        Args:
+            users: Iterable of (username, email, password) tuples
+
+        Returns:
+            One result dict per input, in order, shaped like register_user's
+        """
+        users = list(users)
+        results: List[Optional[Dict]] = [None] * len(users)
+
+        # Validate up front, including duplicates within the batch itself
+        accepted = []
+        batch_usernames, batch_emails = set(), set()
+        for i, (username, email, password) in enumerate(users):
+            error = self._validate_registration(username, email, password)
+            if not error and username in batch_usernames:
+                error = {"status": "error", "message": "Username already exists"}
+            if not error and email in batch_emails:
+                error = {"status": "error", "message": "Email already registered"}
+
+            if error:
+                results[i] = error
+            else:
+                accepted.append(i)
+                batch_usernames.add(username)
+                batch_emails.add(email)
+
+        hashes = self._kdf_pool.map(_kdf_hash, [users[i][2] for i in accepted])
+
+        records = {}
+        for i, password_hash in zip(accepted, hashes):
+            username, email, _ = users[i]
+            records[username] = {
+                "user_id": f"user_{secrets.token_hex(8)}",
+                "username": username,
+                "email": email,
+                "password_hash": password_hash,
+                "created_at": datetime.now().isoformat(),
+                "storage_quota_gb": 1,
+                "verified": False
+            }
+
+        with self._users_lock:
+            committed = {}
+            for i in accepted:
+                username, email, password = users[i]
+                error = self._validate_registration(username, email, password)
+                if error:
+                    results[i] = error
+                else:
+                    committed[username] = records[username]
+                    results[i] = {
+                        "status": "success",
+                        "message": "User registered successfully",
+                        "user_id": records[username]['user_id']
+                    }
+            if committed:
+                self._commit_users(committed)
+
+        print(f"✅ Bulk registered {len(committed)}/{len(users)} users")
+
+        return results
+
     def generate_otp(self, username: str) -> Optional[str]:
         """Generate a 6-digit OTP for a user"""
         if username not in self.users:
             return None
 
-        otp = ''.join([str(secrets.randbelow(10)) for _ in range(6)])
+        otp = f"{secrets.randbelow(1000000):06d}"
 
         # Store OTP with 5-minute expiry
         self.active_otps[username] = {
             "otp": otp,
             "generated_at": datetime.now().isoformat(),
-            "expires_in_seconds": 300  # 5 minutes
+            "expires_at": time.monotonic() + self.otp_ttl_seconds
         }
 
         print(f"🔑 Generated OTP for '{username}': {otp}")
 
         return otp
 
+    def _otp_sweeper(self):
+        """Periodically evict OTPs that were never used"""
+        while True:
+            time.sleep(self.otp_sweep_seconds)
+            now = time.monotonic()
+            for username, otp_data in list(self.active_otps.items()):
+                if now > otp_data['expires_at']:
+                    self.active_otps.pop(username, None)
+
     def verify_otp(self, username: str, otp: str) -> bool:
         """Verify an OTP for a user"""
-        if username not in self.active_otps:
+        # Single lookup: the sweeper may pop the entry at any moment
+        otp_data = self.active_otps.get(username)
+        if otp_data is None:
             print(f"❌ No OTP found for user '{username}'")
             return False
 
-        stored_otp = self.active_otps[username]['otp']
+        if time.monotonic() > otp_data['expires_at']:
+            print(f"❌ OTP expired for user '{username}'")
+            self.active_otps.pop(username, None)
+            return False
+
+        stored_otp = otp_data['otp']
 
-        if stored_otp == otp:
+        # Constant-time compare so response timing doesn't leak matching digits
+        if hmac.compare_digest(stored_otp.encode('utf-8'), (otp or '').encode('utf-8')):
             print(f"✅ OTP verified for user '{username}'")
             # Mark user as verified
-            if username in self.users:
-                self.users[username]['verified'] = True
-                self._save_users()
+            with self._users_lock:
+                user = self.users.get(username)
+                if user is not None:
+                    self._commit_user(username, {**user, 'verified': True})
 
             # Remove used OTP
-            del self.active_otps[username]
+            self.active_otps.pop(username, None)
             return True
 
         print(f"❌ Invalid OTP for user '{username}'")
@@ -212,15 +536,15 @@ Cloud Storage System Team
         print(f"🔐 Authentication attempt for user: '{username}'")
         print(f"{'='*70}")
 
-        if username not in self.users:
+        user = self.users.get(username)
+
+        if user is None:
             print(f"❌ User '{username}' not found")
             return {
                 "status": "error",
                 "message": "Invalid username or password"
             }
 
-        user = self.users[username]
-
         if not self._verify_password(password, user['password_hash']):
             print(f"❌ Invalid password for user '{username}'")
             return {
@@ -230,6 +554,14 @@ Cloud Storage System Team
 
         print(f"✅ Password verified for user '{username}'")
 
+        # Transparently upgrade legacy/outdated hashes
+        if self._needs_rehash(user['password_hash']):
+            new_hash = self._hash_password(password)
+            with self._users_lock:
+                current = self.users.get(username)
+                if current is not None:
+                    self._commit_user(username, {**current, 'password_hash': new_hash})
+
         # Generate OTP for 2FA
         otp = self.generate_otp(username)
 
@@ -240,10 +572,11 @@ Cloud Storage System Team
         print(f"⏰ Valid for: 5 minutes")
         print(f"{'='*70}\n")
 
-        # Send email if requested
+        # Queue email if requested (delivered by the mail worker thread)
         email_sent = False
         if send_email:
-            email_sent = self._send_otp_email(user['email'], otp, username)
+            self._mail_q.put((user['email'], otp, username))
+            email_sent = True
 
         return {
             "status": "otp_required",
@@ -283,14 +616,23 @@ Cloud Storage System Team
             }
         }
 
-    def get_user(self, username: str) -> Optional[Dict]:
-        """Get user information (without sensitive data)"""
-        if username not in self.users:
+    def get_user(self, username: str) -> Optional[Mapping]:
+        """Get a read-only view of user information (without sensitive data)"""
+        user = self.users.get(username)
+        if user is None:
             return None
 
-        user = self.users[username].copy()
-        del user['password_hash']  # Don't expose password hash
-        return user
+        # Records are copy-on-write, so an unchanged record is the same object:
+        # identity doubles as a per-user version stamp
+        cached = self._safe_views.get(username)
+        if cached is not None and cached[0] is user:
+            return cached[1]
+
+        # Don't expose password hash
+        view = MappingProxyType({k: v for k, v in user.items()
+                                 if k != 'password_hash'})
+        self._safe_views[username] = (user, view)
+        return view
 
     def list_users(self) -> list:
         """List all usernames"""
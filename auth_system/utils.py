@@ -1,5 +1,5 @@
 import bcrypt
-import random
+import secrets
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -10,7 +10,7 @@ def hash_password(password):
                          bcrypt.gensalt()).decode('utf-8')
 
 def generate_otp():
-    return str(random.randint(100000, 999999))
+    return str(100000 + secrets.randbelow(900000))
 
 def send_otp(to_email) -> str:
 
@@ -20,10 +20,13 @@ test_user = {
     "password": "TestPass123!"
 }
 
+# One keep-alive session for every step, so the whole run reuses a single connection
+session = requests.Session()
+
 print("\n1️⃣  REGISTER USER")
 print("-" * 70)
 try:
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/register",
         json=test_user,
         headers={"Content-Type": "application/json"}
@@ -39,7 +42,6 @@ except Exception as e:
 
 print("\n2️⃣  LOGIN USER (Trigger OTP Email)")
 print("-" * 70)
-session = requests.Session()
 try:
     response = session.post(
         f"{BASE_URL}/login",
@@ -70,7 +72,11 @@ try:
                         "otp": otp,
                         "username": test_user["username"]
                     },
-                    headers={"Content-Type": "application/json"}
+                    headers={
+                        "Content-Type": "application/json",
+                        # Signed ticket from the login step identifies the pending login
+                        "X-OTP-Ticket": data.get("otp_ticket", "")
+                    }
                 )
                 print(f"Status: {verify_response.status_code}")
                 verify_data = verify_response.json()
@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for the complete application (app.py)
+
+Run from the project root:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import os
+
+bind = "0.0.0.0:5000"
+
+# Sessions, the session/VHD caches and the per-VHD write locks live in
+# process memory, and users/VHD metadata are plain JSON files, so a single
+# worker owns all state. Uploads, downloads and replication are I/O-bound,
+# so threads give the concurrency.
+workers = 1
+worker_class = "gthread"
+threads = 4 * (os.cpu_count() or 1)
+
+# Large uploads and downloads can legitimately take a while
+timeout = 300
+
+# Not preloaded: the node cluster and replication pool started in a master
+# process would not survive the fork into the worker.
+preload_app = False
@@ -1,47 +1,99 @@
+import os
 import bcrypt
-import random
+import secrets
+from functools import lru_cache
+
+# bcrypt work factor; test setups can lower it (minimum 4) to speed things up
+BCRYPT_COST = int(os.environ.get('BCRYPT_COST', '12'))
 
 def hash_password(password):
     """Encrypt a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_COST)).decode('utf-8')
 
 def check_password(plain_password, hashed_password):
-    """Check if a password matches the hashed version"""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    """Check if a password matches the hashed version (str or bytes)"""
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
 
 def generate_otp():
     """Generate a 6-digit OTP code"""
-    return str(random.randint(100000, 999999))
+    return str(100000 + secrets.randbelow(900000))
 
-def load_credentials():
-    """Load user credentials from file"""
+CREDENTIALS_FILE = 'credentials.txt'
+
+@lru_cache(maxsize=1)
+def _parse_credentials(version):
+    """Parse the credentials file; cached until its (mtime_ns, size) version changes"""
     credentials = {}
     emails = {}
 
+    with open(CREDENTIALS_FILE, 'r') as file:
+        for line in file:
+            parts = line.strip().split(',')
+            if len(parts) == 3:
+                username, email, password = parts
+                # Hash the password if it's not already hashed
+                if not password.startswith('$2b$'):
+                    password = hash_password(password)
+                # Kept as bytes so check_password doesn't re-encode per call
+                credentials[username] = password.encode('utf-8')
+                emails[username] = email
+
+    return credentials, emails
+
+def load_credentials():
+    """Load user credentials from file"""
     try:
-        with open('credentials.txt', 'r') as file:
-            for line in file:
-                parts = line.strip().split(',')
-                if len(parts) == 3:
-                    username, email, password = parts
-                    # Hash the password if it's not already hashed
-                    if not password.startswith('$2b$'):
-                        password = hash_password(password)
-                    credentials[username] = password
-                    emails[username] = email
+        st = os.stat(CREDENTIALS_FILE)
+        return _parse_credentials((st.st_mtime_ns, st.st_size))
     except FileNotFoundError:
         print("⚠️  credentials.txt not found!")
+        return {}, {}
 
-    return credentials, emails
+def migrate_plaintext_hashes():
+    """Rewrite any plaintext passwords in the credentials file as bcrypt hashes"""
+    try:
+        with open(CREDENTIALS_FILE, 'r') as file:
+            lines = [line.strip() for line in file]
+    except FileNotFoundError:
+        return 0
+
+    migrated = 0
+    for i, line in enumerate(lines):
+        parts = line.split(',')
+        if len(parts) == 3 and not parts[2].startswith('$2b$'):
+            lines[i] = f"{parts[0]},{parts[1]},{hash_password(parts[2])}"
+            migrated += 1
 
-def verify_node_credentials(username, password):
-    """Verify if a node's username and password are correct"""
+    if migrated:
+        # Write beside the original and swap it in, so a crash never truncates it
+        temp_file = CREDENTIALS_FILE + '.tmp'
+        with open(temp_file, 'w') as file:
+            for line in lines:
+                if line:
+                    file.write(line + '\n')
+        os.replace(temp_file, CREDENTIALS_FILE)
+        print(f"🔐 Hashed {migrated} plaintext password(s) in {CREDENTIALS_FILE}")
+
+    return migrated
+
+def verify_node_credentials(username, password, executor=None):
+    """Verify if a node's username and password are correct
+
+    If an executor is given, the bcrypt check runs on it instead of the caller's thread.
+    """
     credentials, emails = load_credentials()
 
     if username not in credentials:
         return False, None
 
-    if check_password(password, credentials[username]):
+    if executor is not None:
+        matched = executor.submit(check_password, password, credentials[username]).result()
+    else:
+        matched = check_password(password, credentials[username])
+
+    if matched:
         return True, emails[username]
 
     return False, None
@@ -1,37 +1,75 @@
+import os
 import bcrypt
+import hmac
+import secrets
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from email_utils import generate_otp, send_otp_email
 
 # In-memory OTP storage (in production, use database)
 otp_storage = {}  # {username: (otp, timestamp)}
 
+# bcrypt work factor; tune to the deployment CPU, or drop to 4 for tests
+BCRYPT_COST = int(os.environ.get('BCRYPT_COST', '12'))
+
+# Recent password checks, keyed by a keyed HMAC so no plaintext password is
+# held in memory; entries expire after VERIFY_CACHE_TTL seconds (0 disables)
+VERIFY_CACHE_TTL = int(os.environ.get('VERIFY_CACHE_TTL', '60'))
+VERIFY_CACHE_SIZE = 1024
+_verify_cache = OrderedDict()  # {key: (expires_at, result)}
+_verify_cache_lock = threading.Lock()
+_cache_secret = secrets.token_bytes(32)
+
+# Parsed credentials.txt, tagged with the (mtime_ns, size) it was read at.
+# enroll_user updates it in place after appending so it stays a hit
+_cred_cache = {'version': None, 'data': None}
+_cred_lock = threading.Lock()
+
 def hash_password(password):
     """Hash password with bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_COST)).decode('utf-8')
 
 def check_password(plain_password, hashed_password):
     """Verify password"""
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
-def load_credentials():
-    """Load credentials from file"""
+def _credentials_version():
+    """Identify the current credentials.txt contents without reading it"""
+    st = os.stat('credentials.txt')
+    # Size is included so appends within one mtime tick still invalidate
+    return (st.st_mtime_ns, st.st_size)
+
+def _parse_credentials():
+    """Parse credentials.txt"""
     credentials = {}
     emails = {}
 
+    with open('credentials.txt', 'r') as file:
+        for line in file:
+            parts = line.strip().split(',')
+            if len(parts) == 3:
+                username, email, password = parts
+                credentials[username] = password
+                emails[username] = email
+
+    return credentials, emails
+
+def load_credentials():
+    """Load credentials from file"""
     try:
-        with open('credentials.txt', 'r') as file:
-            for line in file:
-                parts = line.strip().split(',')
-                if len(parts) == 3:
-                    username, email, password = parts
-                    credentials[username] = password
-                    emails[username] = email
+        version = _credentials_version()
     except FileNotFoundError:
         print("⚠️  credentials.txt not found, creating default...")
         create_default_credentials()
         return load_credentials()
 
-    return credentials, emails
+    # Only re-read the file when it has changed since it was last parsed
+    if _cred_cache['version'] != version:
+        _cred_cache['data'] = _parse_credentials()
+        _cred_cache['version'] = version
+    return _cred_cache['data']
 
 def create_default_credentials():
     """Create default credentials file"""
@@ -43,10 +81,14 @@ def create_default_credentials():
         "node5,node5@example.com,password222",
     ]
 
+    entries = [cred.split(',') for cred in defaults]
+
+    # bcrypt releases the GIL while hashing, so threads hash the defaults in parallel
+    with ThreadPoolExecutor(max_workers=min(len(entries), os.cpu_count() or 1)) as pool:
+        hashes = list(pool.map(hash_password, [password for _, _, password in entries]))
+
     with open('credentials.txt', 'w') as file:
-        for cred in defaults:
-            username, email, password = cred.split(',')
-            hashed = hash_password(password)
+        for (username, email, _), hashed in zip(entries, hashes):
             file.write(f"{username},{email},{hashed}\n")
 
     print("✅ Created default credentials.txt")
@@ -60,11 +102,52 @@ def enroll_user(username, email, password):
 
     hashed_password = hash_password(password)
 
-    with open('credentials.txt', 'a') as file:
-        file.write(f"{username},{email},{hashed_password}\n")
+    with _cred_lock:
+        # Re-check now that we hold the lock, in case of a concurrent enroll
+        credentials, emails = load_credentials()
+        if username in credentials:
+            return False, "Username already exists"
+
+        with open('credentials.txt', 'a') as file:
+            file.write(f"{username},{email},{hashed_password}\n")
+
+        # Apply the append to the cached copy instead of re-parsing the file
+        credentials[username] = hashed_password
+        emails[username] = email
+        _cred_cache['version'] = _credentials_version()
+
+    with _verify_cache_lock:
+        _verify_cache.clear()
 
     return True, "User enrolled successfully"
 
+def _cached_check_password(username, password, hashed_password):
+    """check_password, skipping bcrypt for a repeat of a recent check"""
+    if VERIFY_CACHE_TTL <= 0:
+        return check_password(password, hashed_password)
+
+    # The stored hash is part of the key, so a password change misses the cache
+    key = hmac.new(_cache_secret,
+                   f"{username}|{password}|{hashed_password}".encode('utf-8'),
+                   'sha256').digest()
+    now = time.time()
+
+    with _verify_cache_lock:
+        cached = _verify_cache.get(key)
+        if cached is not None and cached[0] > now:
+            _verify_cache.move_to_end(key)
+            return cached[1]
+
+    result = check_password(password, hashed_password)
+
+    with _verify_cache_lock:
+        _verify_cache[key] = (now + VERIFY_CACHE_TTL, result)
+        _verify_cache.move_to_end(key)
+        while len(_verify_cache) > VERIFY_CACHE_SIZE:
+            _verify_cache.popitem(last=False)
+
+    return result
+
 def verify_credentials(username, password):
     """Verify username and password"""
     credentials, emails = load_credentials()
@@ -72,7 +155,7 @@ def verify_credentials(username, password):
     if username not in credentials:
         return False, None
 
-    if check_password(password, credentials[username]):
+    if _cached_check_password(username, password, credentials[username]):
         return True, emails[username]
 
     return False, None
@@ -96,7 +179,7 @@ def verify_otp(username, otp):
         del otp_storage[username]
         return False, "OTP expired"
 
-    if stored_otp == otp:
+    if hmac.compare_digest(str(stored_otp).encode('utf-8'), str(otp or '').encode('utf-8')):
         del otp_storage[username]
         return True, "OTP verified"
 
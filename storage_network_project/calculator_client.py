@@ -1,29 +1,41 @@
+import atexit
 import grpc
 import sys
 import calculator_pb2
 import calculator_pb2_grpc
 
+_channel = None
+_stub = None
+
+def _get_stub():
+    """Return the shared calculator stub, opening its channel on first use"""
+    global _channel, _stub
+    if _stub is None:
+        _channel = grpc.insecure_channel('localhost:9000')
+        atexit.register(_channel.close)
+        _stub = calculator_pb2_grpc.CalculatorServiceStub(_channel)
+    return _stub
+
 def run_calculator(operation, num1, num2):
-    with grpc.insecure_channel('localhost:9000') as channel:
-        stub = calculator_pb2_grpc.CalculatorServiceStub(channel)
-        request = calculator_pb2.CalculatorRequest(num1=num1, num2=num2)
-
-        if operation == 'add':
-            response = stub.Add(request)
-        elif operation == 'subtract':
-            response = stub.Subtract(request)
-        elif operation == 'multiply':
-            response = stub.Multiply(request)
-        elif operation == 'divide':
-            response = stub.Divide(request)
-        else:
-            print("Invalid operation")
-            return
-
-        if response.success:
-            print(f"Result of {operation}: {response.result}")
-        else:
-            print(f"Error: {response.error}")
+    stub = _get_stub()
+    request = calculator_pb2.CalculatorRequest(num1=num1, num2=num2)
+
+    if operation == 'add':
+        response = stub.Add(request)
+    elif operation == 'subtract':
+        response = stub.Subtract(request)
+    elif operation == 'multiply':
+        response = stub.Multiply(request)
+    elif operation == 'divide':
+        response = stub.Divide(request)
+    else:
+        print("Invalid operation")
+        return
+
+    if response.success:
+        print(f"Result of {operation}: {response.result}")
+    else:
+        print(f"Error: {response.error}")
 
 if __name__ == '__main__':
     if len(sys.argv) != 4:
@@ -1,3 +1,4 @@
+import os
 import grpc
 from concurrent import futures
 import calculator_pb2
@@ -45,7 +46,7 @@ class CalculatorServiceServicer(calculator_pb2_grpc.CalculatorServiceServicer):
         )
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2))
     calculator_pb2_grpc.add_CalculatorServiceServicer_to_server(
         CalculatorServiceServicer(), server
     )
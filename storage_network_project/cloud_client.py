@@ -1,55 +1,65 @@
+import atexit
 import grpc
 import sys
 import cloud_pb2
 import cloud_pb2_grpc
 
+_channel = None
+_stub = None
+
+def _get_stub():
+    """Return the shared cloud service stub, opening its channel on first use"""
+    global _channel, _stub
+    if _stub is None:
+        _channel = grpc.insecure_channel('localhost:8000')
+        atexit.register(_channel.close)
+        _stub = cloud_pb2_grpc.CloudServiceStub(_channel)
+    return _stub
+
 def enroll(username, email, password):
     """Enroll a new user"""
-    with grpc.insecure_channel('localhost:8000') as channel:
-        stub = cloud_pb2_grpc.CloudServiceStub(channel)
-        response = stub.Enroll(cloud_pb2.EnrollRequest(
-            username=username,
-            email=email,
-            password=password
-        ))
+    stub = _get_stub()
+    response = stub.Enroll(cloud_pb2.EnrollRequest(
+        username=username,
+        email=email,
+        password=password
+    ))
 
-        if response.success:
-            print(f"✅ {response.message}")
-        else:
-            print(f"❌ {response.message}")
+    if response.success:
+        print(f"✅ {response.message}")
+    else:
+        print(f"❌ {response.message}")
 
 def login(username, password):
     """Login a user"""
-    with grpc.insecure_channel('localhost:8000') as channel:
-        stub = cloud_pb2_grpc.CloudServiceStub(channel)
-        response = stub.Login(cloud_pb2.LoginRequest(
-            username=username,
-            password=password
-        ))
+    stub = _get_stub()
+    response = stub.Login(cloud_pb2.LoginRequest(
+        username=username,
+        password=password
+    ))
 
-        if response.success:
-            print(f"✅ Login successful!")
-            print(f"📧 OTP sent to: {response.email}")
-            print(f"🔑 OTP: {response.otp}")
-        else:
-            print(f"❌ {response.message}")
+    if response.success:
+        print(f"✅ Login successful!")
+        print(f"📧 OTP sent to: {response.email}")
+        print(f"🔑 OTP: {response.otp}")
+    else:
+        print(f"❌ {response.message}")
 
 def get_nodes():
     """Get all registered nodes"""
-    with grpc.insecure_channel('localhost:8000') as channel:
-        stub = cloud_pb2_grpc.CloudServiceStub(channel)
-        response = stub.GetNodes(cloud_pb2.NodesRequest())
+    stub = _get_stub()
+    response = stub.GetNodes(cloud_pb2.NodesRequest())
 
-        print(f"\n📊 Total Nodes: {response.total_nodes}")
-        print("=" * 60)
+    print(f"\n📊 Total Nodes: {response.total_nodes}")
+    print("=" * 60)
 
-        for node in response.nodes:
-            print(f"🖥️  Node: {node.node_id}")
-            print(f"   👤 User: {node.username}")
-            print(f"   📍 Address: {node.ip}:{node.port}")
-            print(f"   💾 Capacity: {node.storage_capacity / (1024**3):.2f} GB")
-            print(f"   📊 Status: {node.status}")
-            print("-" * 60)
+    for node in response.nodes:
+        print(f"🖥️  Node: {node.node_id}")
+        print(f"   👤 User: {node.username}")
+        print(f"   📍 Address: {node.ip}:{node.port}")
+        print(f"   💾 Capacity: {node.storage_capacity / (1024**3):.2f} GB")
+        print(f"   📊 Status: {node.status}")
+        print("-" * 60)
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
@@ -1,12 +1,18 @@
 from flask import Flask, request, jsonify
+import os
 import time
-from auth_utils import verify_node_credentials, generate_otp, print_otp
+from concurrent.futures import ProcessPoolExecutor
+from auth_utils import verify_node_credentials, generate_otp, print_otp, migrate_plaintext_hashes
 
 app = Flask(__name__)
 
 # This stores information about all registered nodes
 registered_nodes = {}
 
+# bcrypt checks run in worker processes so registrations don't tie up
+# request threads (or the GIL) for the whole KDF
+_bcrypt_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+
 @app.route('/register', methods=['POST'])
 def register_node():
     """Nodes call this to register - NOW WITH AUTHENTICATION"""
@@ -26,7 +32,7 @@ def register_node():
 
     # Verify credentials
     print(f"🔐 Authentication attempt for node: {node_id} (username: {username})")
-    is_valid, email = verify_node_credentials(username, password)
+    is_valid, email = verify_node_credentials(username, password, executor=_bcrypt_pool)
 
     if not is_valid:
         print(f"❌ Authentication failed for: {username}")
@@ -99,4 +105,5 @@ if __name__ == '__main__':
     print("🔐 Authentication: ENABLED")
     print("🎯 Nodes must provide username/password to register")
     print("=" * 60)
+    migrate_plaintext_hashes()
     app.run(host='0.0.0.0', port=8000, debug=True)
\ No newline at end of file
@@ -1,5 +1,8 @@
 import time
+import heapq
+import itertools
 import random
+from collections import deque
 from dataclasses import dataclass
 from typing import List, Optional
 from enum import Enum
@@ -32,11 +35,12 @@ class VirtualMachine:
     current_cloudlet: Optional['Cloudlet'] = None
     total_executed: int = 0
     total_execution_time: float = 0
-    utilization_history: List[float] = None
+    utilization_history: deque = None  # most recent HISTORY_WINDOW samples
+
+    HISTORY_WINDOW = 1024
 
     def __post_init__(self):
-        if self.utilization_history is None:
-            self.utilization_history = []
+        self.utilization_history = deque(self.utilization_history or (), maxlen=self.HISTORY_WINDOW)
 
     def get_utilization(self) -> float:
         """Calculate current utilization percentage"""
@@ -80,10 +84,8 @@ class CloudScheduler:
     @staticmethod
     def round_robin(cloudlet: Cloudlet, vms: List[VirtualMachine]) -> Optional[VirtualMachine]:
         """Simple round-robin scheduling"""
-        available_vms = [vm for vm in vms if vm.status == VMStatus.IDLE and vm.can_execute(cloudlet)]
-        if not available_vms:
-            return None
-        return min(available_vms, key=lambda v: v.total_executed)
+        return min((vm for vm in vms if vm.status == VMStatus.IDLE and vm.can_execute(cloudlet)),
+                   key=lambda v: v.total_executed, default=None)
 
     @staticmethod
     def first_fit(cloudlet: Cloudlet, vms: List[VirtualMachine]) -> Optional[VirtualMachine]:
@@ -96,17 +98,8 @@ class CloudScheduler:
     @staticmethod
     def min_min(cloudlet: Cloudlet, vms: List[VirtualMachine]) -> Optional[VirtualMachine]:
         """Select VM with minimum expected completion time"""
-        available_vms = [vm for vm in vms if vm.status == VMStatus.IDLE and vm.can_execute(cloudlet)]
-        if not available_vms:
-            return None
-
-        # Calculate expected completion time for each VM
-        completion_times = []
-        for vm in available_vms:
-            exec_time = cloudlet.length / (vm.mips * vm.cores)
-            completion_times.append((vm, exec_time))
-
-        return min(completion_times, key=lambda x: x[1])[0]
+        return min((vm for vm in vms if vm.status == VMStatus.IDLE and vm.can_execute(cloudlet)),
+                   key=lambda vm: cloudlet.length / (vm.mips * vm.cores), default=None)
 
 class CloudDatacenter:
     """Simulated datacenter managing VMs and cloudlets"""
@@ -114,13 +107,40 @@ class CloudDatacenter:
     def __init__(self, datacenter_id: str, scheduling_policy: str = "round_robin"):
         self.datacenter_id = datacenter_id
         self.vms: List[VirtualMachine] = []
-        self.cloudlet_queue: List[Cloudlet] = []
+        self.cloudlet_queue: deque = deque()
+        self._queue_lock = threading.Lock()
         self.completed_cloudlets: List[Cloudlet] = []
         self.failed_cloudlets: List[Cloudlet] = []
         self.scheduling_policy = scheduling_policy
         self.simulation_time = 0.0
+        self._start_time = 0.0
         self.is_running = False
 
+        # run_simulation sleeps until there is something to place: a new
+        # submission or a VM freeing up sets _pending and notifies
+        self._wakeup = threading.Condition()
+        self._pending = False
+
+        # Running cloudlets as a min-heap of (finish wall time, seq, vm, cloudlet)
+        self._events = []
+        self._event_seq = itertools.count()
+
+    def _clock(self) -> float:
+        """Bring simulation_time up to date with the wall clock while running"""
+        if self.is_running:
+            self.simulation_time = time.time() - self._start_time
+        return self.simulation_time
+
+    def now(self) -> float:
+        """Current simulation time"""
+        return self._clock()
+
+    def _notify(self):
+        """Wake the simulation loop to run the scheduler"""
+        with self._wakeup:
+            self._pending = True
+            self._wakeup.notify()
+
     def add_vm(self, vm: VirtualMachine):
         """Add a VM to the datacenter"""
         self.vms.append(vm)
@@ -128,10 +148,12 @@ class CloudDatacenter:
 
     def submit_cloudlet(self, cloudlet: Cloudlet):
         """Submit a cloudlet for execution"""
-        cloudlet.submission_time = self.simulation_time
+        cloudlet.submission_time = self._clock()
         cloudlet.status = CloudletStatus.QUEUED
-        self.cloudlet_queue.append(cloudlet)
+        with self._queue_lock:
+            self.cloudlet_queue.append(cloudlet)
         print(f"📥 Cloudlet {cloudlet.cloudlet_id} submitted (Size: {cloudlet.file_size}MB, Length: {cloudlet.length}MI)")
+        self._notify()
 
     def schedule_cloudlets(self):
         """Assign queued cloudlets to available VMs"""
@@ -144,58 +166,69 @@ class CloudDatacenter:
             "min_min": CloudScheduler.min_min
         }.get(self.scheduling_policy, CloudScheduler.round_robin)
 
-        i = 0
-        while i < len(self.cloudlet_queue):
-            cloudlet = self.cloudlet_queue[i]
-            vm = scheduler(cloudlet, self.vms)
-
-            if vm:
-                # Assign cloudlet to VM
-                cloudlet.assigned_vm = vm.vm_id
-                cloudlet.status = CloudletStatus.EXECUTING
-                cloudlet.start_time = self.simulation_time
-                cloudlet.waiting_time = cloudlet.start_time - cloudlet.submission_time
-
-                vm.status = VMStatus.BUSY
-                vm.current_cloudlet = cloudlet
-
-                # Calculate execution time
-                exec_time = cloudlet.length / (vm.mips * vm.cores)
-                cloudlet.execution_time = exec_time
-
-                print(f"🔄 Cloudlet {cloudlet.cloudlet_id} assigned to VM {vm.vm_id} (Est. time: {exec_time:.2f}s)")
-
-                # Remove from queue
-                self.cloudlet_queue.pop(i)
-
-                # Simulate execution in background
-                threading.Thread(target=self._execute_cloudlet, args=(vm, cloudlet), daemon=True).start()
-            else:
-                i += 1
-
-    def _execute_cloudlet(self, vm: VirtualMachine, cloudlet: Cloudlet):
-        """Simulate cloudlet execution"""
-        # Simulate processing time
-        time.sleep(cloudlet.execution_time)
-
-        # Complete cloudlet
-        cloudlet.finish_time = self.simulation_time + cloudlet.execution_time
+        # Only idle VMs can take work, and once every one of them is assigned
+        # nothing else in the queue can be placed, so stop scanning
+        idle_vms = [vm for vm in self.vms if vm.status == VMStatus.IDLE]
+
+        # Held for the whole pass so a concurrent submit can't append
+        # while the queue is being popped and rotated
+        with self._queue_lock:
+            # Walk the queue once, popping from the front and re-appending whatever
+            # can't be placed yet
+            skipped = 0
+            for _ in range(len(self.cloudlet_queue)):
+                if not idle_vms:
+                    break
+
+                cloudlet = self.cloudlet_queue.popleft()
+                vm = scheduler(cloudlet, idle_vms)
+
+                if vm:
+                    idle_vms.remove(vm)
+
+                    # Assign cloudlet to VM
+                    cloudlet.assigned_vm = vm.vm_id
+                    cloudlet.status = CloudletStatus.EXECUTING
+                    cloudlet.start_time = self.simulation_time
+                    cloudlet.waiting_time = cloudlet.start_time - cloudlet.submission_time
+
+                    vm.status = VMStatus.BUSY
+                    vm.current_cloudlet = cloudlet
+                    vm.utilization_history.append(vm.get_utilization())
+
+                    # Calculate execution time
+                    exec_time = cloudlet.length / (vm.mips * vm.cores)
+                    cloudlet.execution_time = exec_time
+
+                    print(f"🔄 Cloudlet {cloudlet.cloudlet_id} assigned to VM {vm.vm_id} (Est. time: {exec_time:.2f}s)")
+
+                    # Simulate execution: the simulation loop completes it when due
+                    heapq.heappush(self._events, (time.time() + exec_time, next(self._event_seq), vm, cloudlet))
+                else:
+                    self.cloudlet_queue.append(cloudlet)
+                    skipped += 1
+
+            # If we stopped early, put the skipped cloudlets back ahead of the unvisited ones
+            self.cloudlet_queue.rotate(skipped)
+
+    def _complete_cloudlet(self, vm: VirtualMachine, cloudlet: Cloudlet):
+        """Finish a cloudlet whose execution time has elapsed"""
+        cloudlet.finish_time = cloudlet.start_time + cloudlet.execution_time
         cloudlet.status = CloudletStatus.COMPLETED
 
         vm.status = VMStatus.IDLE
         vm.current_cloudlet = None
         vm.total_executed += 1
         vm.total_execution_time += cloudlet.execution_time
+        vm.utilization_history.append(vm.get_utilization())
 
         self.completed_cloudlets.append(cloudlet)
 
         print(f"✅ Cloudlet {cloudlet.cloudlet_id} completed on VM {vm.vm_id} (Time: {cloudlet.execution_time:.2f}s)")
 
-        # Try to schedule more cloudlets
-        self.schedule_cloudlets()
-
     def get_statistics(self) -> dict:
         """Get simulation statistics"""
+        self._clock()
         total_cloudlets = len(self.completed_cloudlets) + len(self.cloudlet_queue) + len(self.failed_cloudlets)
         completed = len(self.completed_cloudlets)
 
@@ -204,9 +237,17 @@ class CloudDatacenter:
         avg_total_time = 0
 
         if self.completed_cloudlets:
-            avg_waiting_time = sum(c.waiting_time for c in self.completed_cloudlets) / len(self.completed_cloudlets)
-            avg_execution_time = sum(c.execution_time for c in self.completed_cloudlets) / len(self.completed_cloudlets)
-            avg_total_time = sum(c.get_total_time() for c in self.completed_cloudlets) / len(self.completed_cloudlets)
+            # One pass over the completed cloudlets for all three averages
+            waiting_sum = execution_sum = total_sum = 0.0
+            for c in self.completed_cloudlets:
+                waiting_sum += c.waiting_time
+                execution_sum += c.execution_time
+                if c.finish_time > 0:
+                    total_sum += c.finish_time - c.submission_time
+
+            avg_waiting_time = waiting_sum / completed
+            avg_execution_time = execution_sum / completed
+            avg_total_time = total_sum / completed
 
         vm_utilization = {}
         for vm in self.vms:
@@ -230,24 +271,35 @@ class CloudDatacenter:
 
     def run_simulation(self, duration: float = 60.0):
         """Run simulation for specified duration"""
+        self._start_time = time.time()
         self.is_running = True
-        start_time = time.time()
+        end_time = self._start_time + duration
 
         print(f"\n{'='*60}")
         print(f"🚀 Starting Simulation - Datacenter: {self.datacenter_id}")
         print(f"{'='*60}")
 
-        while self.is_running and (time.time() - start_time) < duration:
-            self.simulation_time = time.time() - start_time
+        while self.is_running and time.time() < end_time:
+            self._clock()
+
+            # Complete every cloudlet whose execution time has elapsed
+            now = time.time()
+            while self._events and self._events[0][0] <= now:
+                _, _, vm, cloudlet = heapq.heappop(self._events)
+                self._complete_cloudlet(vm, cloudlet)
 
             # Schedule queued cloudlets
             self.schedule_cloudlets()
 
-            # Update VM utilization history
-            for vm in self.vms:
-                vm.utilization_history.append(vm.get_utilization())
+            # Sleep until the next completion is due or a submission arrives
+            wake_at = min(self._events[0][0], end_time) if self._events else end_time
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._pending or not self.is_running,
+                                      timeout=max(0.0, wake_at - time.time()))
+                self._pending = False
 
-            time.sleep(0.5)  # Update interval
+        self._clock()
+        self.is_running = False
 
         print(f"\n{'='*60}")
         print(f"✅ Simulation Complete")
@@ -1,11 +1,11 @@
 import smtplib
-import random
+import secrets
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 def generate_otp():
     """Generate 6-digit OTP"""
-    return str(random.randint(100000, 999999))
+    return str(100000 + secrets.randbelow(900000))
 
 def send_otp_email(to_email, otp, username):
     """
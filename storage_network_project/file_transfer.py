@@ -1,10 +1,42 @@
 import os
 import hashlib
 import math
+import mmap
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Optional
 
+# Keep-alive connection pool shared by every transfer
+_http = requests.Session()
+_http.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+
+def open_chunk_target(path):
+    """Open a file that received chunks are written into at their offsets"""
+    return os.open(path, os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+
+
+def write_chunk_at(fd, data, offset):
+    """Write a chunk at its offset in the target file"""
+    if hasattr(os, 'pwrite'):
+        os.pwrite(fd, data, offset)
+    else:
+        # Windows has no pwrite; callers hold the transfer lock, so the
+        # seek + write pair cannot interleave with another chunk
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def discard_chunk_target(fd, path):
+    """Close and remove a partially written target file"""
+    os.close(fd)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
 
 class FileChunk:
     """Represents a piece of a file"""
@@ -32,25 +64,25 @@ class FileTransferManager:
 
         file_name = os.path.basename(file_path)
         file_size = os.path.getsize(file_path)
-        file_id = hashlib.md5(f"{file_name}-{time.time()}".encode()).hexdigest()
+        file_id = hashlib.blake2b(f"{file_name}-{time.time()}".encode(), digest_size=16).hexdigest()
 
         chunks = []
-        chunk_id = 0
 
         print(f"📦 Chunking file: {file_name} ({file_size} bytes)")
 
-        with open(file_path, 'rb') as f:
-            while True:
-                data = f.read(FileTransferManager.CHUNK_SIZE)
-                if not data:
-                    break
+        if file_size:
+            # Chunks are memoryview slices of a read-only mapping, so the file is
+            # never copied onto the heap just to be hashed; the views keep it mapped
+            with open(file_path, 'rb') as f:
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
 
-                # Calculate checksum for this chunk
-                checksum = hashlib.md5(data).hexdigest()
+            for chunk_id, offset in enumerate(range(0, file_size, FileTransferManager.CHUNK_SIZE)):
+                data = view[offset:offset + FileTransferManager.CHUNK_SIZE]
 
-                chunk = FileChunk(chunk_id, data, checksum)
-                chunks.append(chunk)
-                chunk_id += 1
+                # Calculate checksum for this chunk (BLAKE2b-128, faster than MD5)
+                checksum = hashlib.blake2b(data, digest_size=16).hexdigest()
+
+                chunks.append(FileChunk(chunk_id, data, checksum))
 
         print(f"✂️  Created {len(chunks)} chunks")
         return file_id, file_name, file_size, chunks
@@ -62,17 +94,15 @@ class FileTransferManager:
         Returns: True if successful (ACK received), False otherwise
         """
         try:
-            # Convert binary data to hex string for JSON transfer
-            chunk_data_hex = chunk.data.hex()
-
-            response = requests.post(
+            # Raw chunk bytes as the body, metadata in headers
+            response = _http.post(
                 f"{target_node_url}/receive_chunk",
-                json={
-                    "file_id": file_id,
-                    "chunk_id": chunk.chunk_id,
-                    "chunk_data": chunk_data_hex,
-                    "checksum": chunk.checksum,
-                    "size": chunk.size
+                data=bytes(chunk.data),
+                headers={
+                    "Content-Type": "application/octet-stream",
+                    "X-File-Id": file_id,
+                    "X-Chunk-Id": str(chunk.chunk_id),
+                    "X-Checksum": chunk.checksum
                 },
                 timeout=10
             )
@@ -105,7 +135,7 @@ class FileTransferManager:
 
         # Send metadata first
         try:
-            response = requests.post(
+            response = _http.post(
                 f"{target_node_url}/prepare_receive",
                 json={
                     "file_id": file_id,
@@ -128,27 +158,26 @@ class FileTransferManager:
         total_chunks = len(chunks)
         chunks_sent = 0
 
-        for i in range(0, total_chunks, chunks_per_window):
-            window_chunks = chunks[i:i + chunks_per_window]
+        def send(chunk):
+            return FileTransferManager.send_chunk(target_node_url, file_id, chunk)
+
+        with ThreadPoolExecutor(max_workers=chunks_per_window) as pool:
+            for i in range(0, total_chunks, chunks_per_window):
+                window_chunks = chunks[i:i + chunks_per_window]
 
-            print(f"\n📤 Sending window: chunks {i} to {i + len(window_chunks) - 1}")
+                print(f"\n📤 Sending window: chunks {i} to {i + len(window_chunks) - 1}")
 
-            # Send all chunks in this window
-            window_success = True
-            for chunk in window_chunks:
-                if FileTransferManager.send_chunk(target_node_url, file_id, chunk):
-                    chunks_sent += 1
-                else:
-                    window_success = False
-                    break
+                # Send all chunks in this window at once, then wait for every ACK
+                results = list(pool.map(send, window_chunks))
+                chunks_sent += sum(results)
 
                 # Show progress
                 progress = (chunks_sent / total_chunks) * 100
                 print(f"📊 Progress: {chunks_sent}/{total_chunks} chunks ({progress:.1f}%)")
 
-            if not window_success:
-                print(f"❌ Transfer failed at chunk {i}")
-                return False
+                if not all(results):
+                    print(f"❌ Transfer failed at chunk {window_chunks[results.index(False)].chunk_id}")
+                    return False
 
         print("\n" + "=" * 60)
         print(f"✅ File transfer completed successfully!")
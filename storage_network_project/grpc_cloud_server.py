@@ -1,13 +1,21 @@
 import grpc
 from concurrent import futures
+import os
 import time
+import threading
 import cloud_pb2
 import cloud_pb2_grpc
 from auth_utils_grpc import verify_credentials, create_otp, verify_otp, enroll_user
 
+# RPC handler threads; the RPCs here are short and I/O-bound
+GRPC_WORKERS = int(os.environ.get('GRPC_WORKERS', min(32, (os.cpu_count() or 1) * 2)))
+
 class CloudServiceServicer(cloud_pb2_grpc.CloudServiceServicer):
     def __init__(self):
         self.registered_nodes = {}
+        # GetNodes response, rebuilt only after the node set changes
+        self._nodes_cache = None
+        self._nodes_lock = threading.Lock()
 
     def Register(self, request, context):
         """Register a node with authentication"""
@@ -29,14 +37,16 @@ class CloudServiceServicer(cloud_pb2_grpc.CloudServiceServicer):
         otp = create_otp(request.username, email)
 
         # Register node
-        self.registered_nodes[request.node_id] = {
-            'port': request.port,
-            'username': request.username,
-            'email': email,
-            'storage_capacity': request.storage_capacity,
-            'status': 'online',
-            'last_seen': time.time()
-        }
+        with self._nodes_lock:
+            self.registered_nodes[request.node_id] = {
+                'port': request.port,
+                'username': request.username,
+                'email': email,
+                'storage_capacity': request.storage_capacity,
+                'status': 'online',
+                'last_seen': time.time()
+            }
+            self._nodes_cache = None
 
         print(f"✅ Node registered: {request.node_id} on port {request.port}")
 
@@ -97,24 +107,32 @@ class CloudServiceServicer(cloud_pb2_grpc.CloudServiceServicer):
 
     def GetNodes(self, request, context):
         """Get all registered nodes"""
-        nodes = []
-        for node_id, info in self.registered_nodes.items():
-            nodes.append(cloud_pb2.Node(
-                node_id=node_id,
-                ip='127.0.0.1',
-                port=info['port'],
-                storage_capacity=info['storage_capacity'],
-                status=info['status'],
-                username=info['username']
-            ))
-
-        return cloud_pb2.NodesResponse(
-            nodes=nodes,
-            total_nodes=len(nodes)
-        )
+        # Heartbeats only touch last_seen, which isn't part of the response
+        with self._nodes_lock:
+            if self._nodes_cache is None:
+                nodes = []
+                for node_id, info in self.registered_nodes.items():
+                    nodes.append(cloud_pb2.Node(
+                        node_id=node_id,
+                        ip='127.0.0.1',
+                        port=info['port'],
+                        storage_capacity=info['storage_capacity'],
+                        status=info['status'],
+                        username=info['username']
+                    ))
+
+                self._nodes_cache = cloud_pb2.NodesResponse(
+                    nodes=nodes,
+                    total_nodes=len(nodes)
+                )
+            return self._nodes_cache
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=GRPC_WORKERS),
+        maximum_concurrent_rpcs=GRPC_WORKERS * 4,
+        compression=grpc.Compression.NoCompression
+    )
     cloud_pb2_grpc.add_CloudServiceServicer_to_server(CloudServiceServicer(), server)
     server.add_insecure_port('[::]:8000')
 
@@ -2,10 +2,21 @@ import grpc
 import os
 import sys
 import hashlib
+import zlib
 import math
 import storage_pb2
 import storage_pb2_grpc
 
+# Shared by the transfer client channel and the storage node server: room
+# for 1 MiB chunks plus headroom, larger HTTP/2 frames, and BDP probing so
+# the flow-control window grows to the link instead of stalling each chunk
+TRANSFER_CHANNEL_OPTIONS = [
+    ('grpc.max_send_message_length', 8 * 1024 * 1024),
+    ('grpc.max_receive_message_length', 8 * 1024 * 1024),
+    ('grpc.http2.max_frame_size', 4 * 1024 * 1024),
+    ('grpc.http2.bdp_probe', 1),
+]
+
 class FileTransferClient:
     CHUNK_SIZE = 1024 * 1024  # 1MB chunks
 
@@ -29,7 +40,7 @@ class FileTransferClient:
         print("=" * 60)
 
         # Connect to target node
-        channel = grpc.insecure_channel(f'{target_host}:{target_port}')
+        channel = grpc.insecure_channel(f'{target_host}:{target_port}', options=TRANSFER_CHANNEL_OPTIONS)
         stub = storage_pb2_grpc.FileTransferServiceStub(channel)
 
         # Calculate chunks
@@ -53,40 +64,49 @@ class FileTransferClient:
             print(f"❌ Failed to prepare target: {e}")
             return False
 
-        # Transfer chunks
-        chunks_sent = 0
-        with open(file_path, 'rb') as f:
-            chunk_id = 0
-            while True:
-                chunk_data = f.read(FileTransferClient.CHUNK_SIZE)
-                if not chunk_data:
-                    break
-
-                checksum = hashlib.md5(chunk_data).hexdigest()
-
-                try:
-                    response = stub.TransferChunk(storage_pb2.ChunkRequest(
+        # Report progress about every 1% rather than once per chunk
+        report_every = max(1, num_chunks // 100)
+
+        # Stream every chunk over a single call; gRPC flow control pipelines
+        # them instead of waiting for an ack per chunk
+        def chunk_iter():
+            # One read buffer is reused for the whole file; each request
+            # takes its own copy of just the bytes read
+            buf = bytearray(FileTransferClient.CHUNK_SIZE)
+            view = memoryview(buf)
+            with open(file_path, 'rb') as f:
+                chunk_id = 0
+                while True:
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+
+                    chunk = view[:n]
+                    yield storage_pb2.ChunkRequest(
                         file_id=file_id,
                         chunk_id=chunk_id,
-                        chunk_data=chunk_data,
-                        checksum=checksum
-                    ))
+                        chunk_data=bytes(chunk),
+                        checksum=zlib.crc32(chunk)
+                    )
 
-                    if response.success:
-                        chunks_sent += 1
-                        progress = (chunks_sent / num_chunks) * 100
-                        print(f"✅ Chunk {chunks_sent}/{num_chunks} sent ({progress:.1f}%)")
-                    else:
-                        print(f"❌ Chunk {chunk_id} failed")
-                        return False
+                    chunk_id += 1
+                    if chunk_id % report_every == 0 or chunk_id == num_chunks:
+                        progress = (chunk_id / num_chunks) * 100
+                        print(f"✅ Chunk {chunk_id}/{num_chunks} sent ({progress:.1f}%)")
 
-                except Exception as e:
-                    print(f"❌ Error sending chunk {chunk_id}: {e}")
-                    return False
+        try:
+            summary = stub.TransferChunks(chunk_iter())
+        except Exception as e:
+            print(f"❌ Error streaming chunks: {e}")
+            return False
+        finally:
+            channel.close()
 
-                chunk_id += 1
+        if not summary.success:
+            print(f"❌ Transfer failed after {summary.chunks_received} chunks: {summary.message}")
+            return False
 
-        channel.close()
+        print(f"📦 {summary.node_id} stored {summary.chunks_received} chunks ({summary.bytes_received} bytes)")
 
         print("\n" + "=" * 60)
         print("✅ File transfer completed successfully!")
@@ -3,12 +3,17 @@ from concurrent import futures
 import os
 import sys
 import time
-import hashlib
+import zlib
 import threading
 import storage_pb2
 import storage_pb2_grpc
 import cloud_pb2
 import cloud_pb2_grpc
+from grpc_file_transfer import FileTransferClient, TRANSFER_CHANNEL_OPTIONS
+from file_transfer import open_chunk_target, write_chunk_at, discard_chunk_target
+
+# RPC handler threads; each TransferChunks stream holds one until it ends
+GRPC_WORKERS = int(os.environ.get('GRPC_WORKERS', min(32, (os.cpu_count() or 1) * 2)))
 
 class FileTransferServiceServicer(storage_pb2_grpc.FileTransferServiceServicer):
     def __init__(self, node_id, storage_capacity_gb=15):
@@ -18,6 +23,7 @@ class FileTransferServiceServicer(storage_pb2_grpc.FileTransferServiceServicer):
         self.storage_path = os.path.join("node_storage", node_id)
         os.makedirs(self.storage_path, exist_ok=True)
         self.incoming_transfers = {}
+        self.transfer_lock = threading.Lock()
 
     def PrepareReceive(self, request, context):
         """Prepare to receive a file"""
@@ -29,12 +35,21 @@ class FileTransferServiceServicer(storage_pb2_grpc.FileTransferServiceServicer):
                 message="Insufficient storage space"
             )
 
-        self.incoming_transfers[request.file_id] = {
-            'file_name': request.file_name,
-            'file_size': request.file_size,
-            'total_chunks': request.total_chunks,
-            'received_chunks': {}
-        }
+        # Chunks are written straight into a temp file as they arrive
+        temp_path = os.path.join(self.storage_path, f"{request.file_id}.tmp")
+        with self.transfer_lock:
+            stale = self.incoming_transfers.get(request.file_id)
+            if stale is not None:
+                # A re-prepared transfer starts over in a fresh temp file
+                discard_chunk_target(stale['fd'], stale['temp_path'])
+            self.incoming_transfers[request.file_id] = {
+                'file_name': request.file_name,
+                'file_size': request.file_size,
+                'total_chunks': request.total_chunks,
+                'received_ids': set(),
+                'temp_path': temp_path,
+                'fd': open_chunk_target(temp_path)
+            }
 
         print(f"📥 Preparing to receive: {request.file_name} ({request.file_size} bytes)")
 
@@ -53,7 +68,7 @@ class FileTransferServiceServicer(storage_pb2_grpc.FileTransferServiceServicer):
             )
 
         # Verify checksum
-        actual_checksum = hashlib.md5(request.chunk_data).hexdigest()
+        actual_checksum = zlib.crc32(request.chunk_data)
         if actual_checksum != request.checksum:
             print(f"❌ Checksum mismatch for chunk {request.chunk_id}")
             return storage_pb2.ChunkResponse(
@@ -62,15 +77,14 @@ class FileTransferServiceServicer(storage_pb2_grpc.FileTransferServiceServicer):
                 node_id=self.node_id
             )
 
-        # Store chunk
-        transfer = self.incoming_transfers[request.file_id]
-        transfer['received_chunks'][request.chunk_id] = request.chunk_data
-
-        print(f"📥 Received chunk {request.chunk_id + 1}/{transfer['total_chunks']}")
-
-        # Check if all chunks received
-        if len(transfer['received_chunks']) == transfer['total_chunks']:
-            self._save_complete_file(request.file_id)
+        error = self._store_chunk(request)
+        if error:
+            print(f"❌ {error}")
+            return storage_pb2.ChunkResponse(
+                success=False,
+                ack=-1,
+                node_id=self.node_id
+            )
 
         return storage_pb2.ChunkResponse(
             success=True,
@@ -78,6 +92,69 @@ class FileTransferServiceServicer(storage_pb2_grpc.FileTransferServiceServicer):
             node_id=self.node_id
         )
 
+    def TransferChunks(self, request_iterator, context):
+        """Receive a whole file over one client stream, writing chunks as they arrive"""
+        file_id = None
+        chunks_received = 0
+        bytes_received = 0
+        for request in request_iterator:
+            file_id = request.file_id
+
+            actual_checksum = zlib.crc32(request.chunk_data)
+            if actual_checksum != request.checksum:
+                print(f"❌ Checksum mismatch for chunk {request.chunk_id}")
+                return self._chunk_summary(False, chunks_received, bytes_received,
+                                           f"Checksum mismatch for chunk {request.chunk_id}")
+
+            error = self._store_chunk(request)
+            if error:
+                print(f"❌ {error}")
+                return self._chunk_summary(False, chunks_received, bytes_received, error)
+
+            chunks_received += 1
+            bytes_received += len(request.chunk_data)
+
+        if file_id is None:
+            return self._chunk_summary(False, 0, 0, "No chunks received")
+
+        # The last chunk finalizes the file and clears the transfer
+        if file_id in self.incoming_transfers:
+            print(f"❌ Stream ended after {chunks_received} chunks")
+            return self._chunk_summary(False, chunks_received, bytes_received, "Incomplete transfer")
+
+        return self._chunk_summary(True, chunks_received, bytes_received, "Transfer complete")
+
+    def _store_chunk(self, request):
+        """Write a verified chunk at its offset; returns an error message or None"""
+        with self.transfer_lock:
+            transfer = self.incoming_transfers.get(request.file_id)
+            if transfer is None:
+                return "Unknown file_id"
+            if not 0 <= request.chunk_id < transfer['total_chunks']:
+                return f"Chunk id {request.chunk_id} out of range"
+
+            offset = request.chunk_id * FileTransferClient.CHUNK_SIZE
+            write_chunk_at(transfer['fd'], request.chunk_data, offset)
+            # A set of ids, so a re-sent chunk can't complete a file with holes
+            transfer['received_ids'].add(request.chunk_id)
+
+            received, total = len(transfer['received_ids']), transfer['total_chunks']
+            if received % max(1, total // 100) == 0 or received == total:
+                print(f"📥 Received {received}/{total} chunks")
+
+            if received == total:
+                self._save_complete_file(request.file_id)
+        return None
+
+    def _chunk_summary(self, success, chunks_received, bytes_received, message):
+        return storage_pb2.ChunkSummary(
+            success=success,
+            chunks_received=chunks_received,
+            bytes_received=bytes_received,
+            node_id=self.node_id,
+            message=message
+        )
+
     def GetStatus(self, request, context):
         """Get node status"""
         return storage_pb2.StatusResponse(
@@ -89,16 +166,15 @@ class FileTransferServiceServicer(storage_pb2_grpc.FileTransferServiceServicer):
         )
 
     def _save_complete_file(self, file_id):
-        """Save complete file from chunks"""
+        """Close the fully written temp file and move it into place"""
         transfer = self.incoming_transfers[file_id]
         file_name = transfer['file_name']
         final_path = os.path.join(self.storage_path, file_name)
 
-        print(f"\n💾 Assembling complete file: {file_name}")
+        print(f"\n💾 Finalizing complete file: {file_name}")
 
-        with open(final_path, 'wb') as f:
-            for chunk_id in sorted(transfer['received_chunks'].keys()):
-                f.write(transfer['received_chunks'][chunk_id])
+        os.close(transfer['fd'])
+        os.replace(transfer['temp_path'], final_path)
 
         self.used_storage += transfer['file_size']
 
@@ -117,29 +193,33 @@ class StorageNode:
         self.cloud_url = 'localhost:8000'
         self.servicer = FileTransferServiceServicer(node_id)
 
+        # One long-lived channel to the cloud for registration and heartbeats
+        self._cloud_channel = grpc.insecure_channel(self.cloud_url, options=[
+            ('grpc.keepalive_time_ms', 30000),
+            ('grpc.keepalive_permit_without_calls', 1)
+        ])
+        self._cloud_stub = cloud_pb2_grpc.CloudServiceStub(self._cloud_channel)
+
     def register_with_cloud(self):
         """Register with cloud using gRPC"""
         try:
-            with grpc.insecure_channel(self.cloud_url) as channel:
-                stub = cloud_pb2_grpc.CloudServiceStub(channel)
-
-                print(f"🔐 Authenticating with cloud...")
-                response = stub.Register(cloud_pb2.RegisterRequest(
-                    node_id=self.node_id,
-                    port=self.port,
-                    username=self.username,
-                    password=self.password,
-                    storage_capacity=self.servicer.storage_capacity
-                ))
-
-                if response.success:
-                    print(f"✅ {response.message}")
-                    print(f"📧 OTP sent to: {response.email}")
-                    print(f"🔑 OTP: {response.otp}")
-                    return True
-                else:
-                    print(f"❌ Registration failed: {response.message}")
-                    return False
+            print(f"🔐 Authenticating with cloud...")
+            response = self._cloud_stub.Register(cloud_pb2.RegisterRequest(
+                node_id=self.node_id,
+                port=self.port,
+                username=self.username,
+                password=self.password,
+                storage_capacity=self.servicer.storage_capacity
+            ))
+
+            if response.success:
+                print(f"✅ {response.message}")
+                print(f"📧 OTP sent to: {response.email}")
+                print(f"🔑 OTP: {response.otp}")
+                return True
+            else:
+                print(f"❌ Registration failed: {response.message}")
+                return False
         except Exception as e:
             print(f"❌ Could not connect to cloud: {e}")
             return False
@@ -148,10 +228,8 @@ class StorageNode:
         """Send periodic heartbeat"""
         while True:
             try:
-                with grpc.insecure_channel(self.cloud_url) as channel:
-                    stub = cloud_pb2_grpc.CloudServiceStub(channel)
-                    stub.Heartbeat(cloud_pb2.HeartbeatRequest(node_id=self.node_id))
-                    print(f"💓 Heartbeat sent")
+                self._cloud_stub.Heartbeat(cloud_pb2.HeartbeatRequest(node_id=self.node_id))
+                print(f"💓 Heartbeat sent")
             except:
                 pass
             time.sleep(30)
@@ -168,6 +246,7 @@ class StorageNode:
 
         if not self.register_with_cloud():
             print("❌ Failed to register with cloud")
+            self._cloud_channel.close()
             return
 
         # Start heartbeat thread
@@ -175,13 +254,21 @@ class StorageNode:
         heartbeat_thread.start()
 
         # Start gRPC server
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+        server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=GRPC_WORKERS),
+            maximum_concurrent_rpcs=GRPC_WORKERS * 4,
+            compression=grpc.Compression.NoCompression,
+            options=TRANSFER_CHANNEL_OPTIONS
+        )
         storage_pb2_grpc.add_FileTransferServiceServicer_to_server(self.servicer, server)
         server.add_insecure_port(f'[::]:{self.port}')
         server.start()
 
         print(f"✅ Node {self.node_id} running on port {self.port}")
-        server.wait_for_termination()
+        try:
+            server.wait_for_termination()
+        finally:
+            self._cloud_channel.close()
 
 if __name__ == '__main__':
     if len(sys.argv) != 5:
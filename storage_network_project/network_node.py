@@ -1,10 +1,12 @@
 from flask import Flask, request, jsonify
+from waitress import serve
 import requests
 import threading
 import time
 import os
 import sys
 import hashlib
+from file_transfer import FileTransferManager, open_chunk_target, write_chunk_at, discard_chunk_target
 
 class NetworkNode:
     def __init__(self, node_id, port, username, password, storage_capacity_gb=15):
@@ -20,8 +22,9 @@ class NetworkNode:
         self.storage_path = os.path.join("node_storage", node_id)
         os.makedirs(self.storage_path, exist_ok=True)
 
-        # Track incoming file transfers
+        # Track incoming file transfers (chunks of one window arrive concurrently)
         self.incoming_transfers = {}
+        self.transfer_lock = threading.Lock()
 
         # Flask app for this node
         self.app = Flask(f"node_{node_id}")
@@ -60,13 +63,21 @@ class NetworkNode:
             if self.used_storage + file_size > self.storage_capacity:
                 return jsonify({"error": "Insufficient storage"}), 507
 
-            self.incoming_transfers[file_id] = {
-                'file_name': file_name,
-                'file_size': file_size,
-                'total_chunks': total_chunks,
-                'received_chunks': {},
-                'temp_path': os.path.join(self.storage_path, f"{file_id}.tmp")
-            }
+            # Chunks are written straight into the temp file as they arrive
+            temp_path = os.path.join(self.storage_path, f"{file_id}.tmp")
+            with self.transfer_lock:
+                stale = self.incoming_transfers.get(file_id)
+                if stale is not None:
+                    # A re-prepared transfer starts over in a fresh temp file
+                    discard_chunk_target(stale['fd'], stale['temp_path'])
+                self.incoming_transfers[file_id] = {
+                    'file_name': file_name,
+                    'file_size': file_size,
+                    'total_chunks': total_chunks,
+                    'received_ids': set(),
+                    'temp_path': temp_path,
+                    'fd': open_chunk_target(temp_path)
+                }
 
             print(f"📥 Preparing to receive: {file_name} ({file_size} bytes, {total_chunks} chunks)")
 
@@ -75,28 +86,39 @@ class NetworkNode:
         @self.app.route('/receive_chunk', methods=['POST'])
         def receive_chunk():
             """Receive a file chunk from another node"""
-            data = request.json
-            file_id = data.get('file_id')
-            chunk_id = data.get('chunk_id')
-            chunk_data_hex = data.get('chunk_data')
-            checksum = data.get('checksum')
+            file_id = request.headers.get('X-File-Id')
+            chunk_id = request.headers.get('X-Chunk-Id', type=int)
+            checksum = request.headers.get('X-Checksum')
 
             if file_id not in self.incoming_transfers:
                 return jsonify({"error": "File transfer not prepared"}), 400
+            if chunk_id is None:
+                return jsonify({"error": "X-Chunk-Id header required"}), 400
 
-            chunk_data = bytes.fromhex(chunk_data_hex)
+            chunk_data = request.get_data(cache=False)
 
-            actual_checksum = hashlib.md5(chunk_data).hexdigest()
+            actual_checksum = hashlib.blake2b(chunk_data, digest_size=16).hexdigest()
             if actual_checksum != checksum:
                 return jsonify({"error": "Checksum mismatch"}), 400
 
-            transfer = self.incoming_transfers[file_id]
-            transfer['received_chunks'][chunk_id] = chunk_data
+            with self.transfer_lock:
+                transfer = self.incoming_transfers.get(file_id)
+                if transfer is None:
+                    return jsonify({"error": "File transfer not prepared"}), 400
+                if not 0 <= chunk_id < transfer['total_chunks']:
+                    return jsonify({"error": "X-Chunk-Id out of range"}), 400
+
+                offset = chunk_id * FileTransferManager.CHUNK_SIZE
+                write_chunk_at(transfer['fd'], chunk_data, offset)
+                # A set of ids, so a re-sent chunk can't complete a file with holes
+                transfer['received_ids'].add(chunk_id)
 
-            print(f"📥 Received chunk {chunk_id + 1}/{transfer['total_chunks']}")
+                received, total = len(transfer['received_ids']), transfer['total_chunks']
+                if received % max(1, total // 100) == 0 or received == total:
+                    print(f"📥 Received {received}/{total} chunks")
 
-            if len(transfer['received_chunks']) == transfer['total_chunks']:
-                self._save_complete_file(file_id)
+                if received == total:
+                    self._save_complete_file(file_id)
 
             return jsonify({
                 "status": "success",
@@ -105,16 +127,15 @@ class NetworkNode:
             }), 200
 
     def _save_complete_file(self, file_id):
-        """Save all received chunks as a complete file"""
+        """Close the fully written temp file and move it into place"""
         transfer = self.incoming_transfers[file_id]
         file_name = transfer['file_name']
         final_path = os.path.join(self.storage_path, file_name)
 
-        print(f"\n💾 Assembling complete file: {file_name}")
+        print(f"\n💾 Finalizing complete file: {file_name}")
 
-        with open(final_path, 'wb') as f:
-            for chunk_id in sorted(transfer['received_chunks'].keys()):
-                f.write(transfer['received_chunks'][chunk_id])
+        os.close(transfer['fd'])
+        os.replace(transfer['temp_path'], final_path)
 
         self.used_storage += transfer['file_size']
 
@@ -186,7 +207,9 @@ class NetworkNode:
             heartbeat_thread = threading.Thread(target=self.send_heartbeat, daemon=True)
             heartbeat_thread.start()
 
-            self.app.run(host='0.0.0.0', port=self.port, debug=False, use_reloader=False)
+            # Waitress serves the concurrent chunk POSTs of a transfer window
+            # on its thread pool, sized to match the sender's connection pool
+            serve(self.app, host='0.0.0.0', port=self.port, threads=16, _quiet=True)
         else:
             print("❌ Failed to start - could not register with cloud")
             print("💡 Check your username and password")
@@ -1,30 +1,38 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 from auth_utils import hash_password
 
+def _hash_line(line):
+    """Return (line, username, hashed) with a plaintext password bcrypt-hashed"""
+    parts = line.strip().split(',')
+    if len(parts) != 3:
+        return None, None, False
+
+    username, email, password = parts
+    # Hash the password if not already hashed
+    if password.startswith('$2b$'):
+        return line.strip(), username, False
+    return f"{username},{email},{hash_password(password)}", username, True
+
 def setup_credentials():
     """Read credentials.txt and hash all passwords"""
     print("🔐 Setting up secure credentials...")
 
-    credentials = []
-
-    # Read the file
-    with open('credentials.txt', 'r') as file:
-        for line in file:
-            parts = line.strip().split(',')
-            if len(parts) == 3:
-                username, email, password = parts
-                # Hash the password if not already hashed
-                if not password.startswith('$2b$'):
-                    hashed_password = hash_password(password)
-                    credentials.append(f"{username},{email},{hashed_password}")
-                    print(f"✅ Hashed password for: {username}")
-                else:
-                    credentials.append(line.strip())
-                    print(f"⏭️  Already hashed: {username}")
-
-    # Write back to file
-    with open('credentials.txt', 'w') as file:
-        for cred in credentials:
-            file.write(cred + '\n')
+    # Stream into a temp file and swap it in, so a crash part-way through
+    # never leaves credentials.txt truncated. bcrypt is CPU-bound by design,
+    # so lines are hashed across all cores; map keeps them in file order
+    with open('credentials.txt', 'r') as fin, open('credentials.txt.tmp', 'w') as fout, \
+            ProcessPoolExecutor() as pool:
+        for cred, username, hashed in pool.map(_hash_line, fin, chunksize=8):
+            if cred is None:
+                continue
+            fout.write(cred + '\n')
+            if hashed:
+                print(f"✅ Hashed password for: {username}")
+            else:
+                print(f"⏭️  Already hashed: {username}")
+
+    os.replace('credentials.txt.tmp', 'credentials.txt')
 
     print("\n✅ Credentials setup complete!")
 
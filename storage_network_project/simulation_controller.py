@@ -1,5 +1,6 @@
 import random
 from cloud_simulator import CloudDatacenter, VirtualMachine, Cloudlet, VMStatus
+import threading
 import time
 
 class SimulationController:
@@ -8,6 +9,9 @@ class SimulationController:
     def __init__(self):
         self.datacenter = CloudDatacenter("DC1", scheduling_policy="min_min")
         self.cloudlet_counter = 0
+        # Completed cloudlets never change, so their rows are built once
+        self._completed_rows = []
+        self._completed_lock = threading.Lock()
         self.setup_infrastructure()
 
     def setup_infrastructure(self):
@@ -70,23 +74,29 @@ class SimulationController:
 
     def get_queue_status(self):
         """Get queued cloudlets"""
+        now = self.datacenter.now()
         return [{
             "cloudlet_id": c.cloudlet_id,
             "file_size": c.file_size,
             "status": c.status.value,
-            "waiting_time": self.datacenter.simulation_time - c.submission_time if c.submission_time > 0 else 0
-        } for c in self.datacenter.cloudlet_queue]
+            "waiting_time": now - c.submission_time if c.submission_time > 0 else 0
+        } for c in list(self.datacenter.cloudlet_queue)]
 
     def get_completed_tasks(self):
         """Get completed cloudlets"""
-        return [{
-            "cloudlet_id": c.cloudlet_id,
-            "file_size": c.file_size,
-            "vm": c.assigned_vm,
-            "waiting_time": c.waiting_time,
-            "execution_time": c.execution_time,
-            "total_time": c.get_total_time()
-        } for c in self.datacenter.completed_cloudlets]
+        completed = self.datacenter.completed_cloudlets
+        # completed_cloudlets is append-only; only format the new arrivals.
+        # The lock keeps concurrent requests from appending the same rows twice
+        with self._completed_lock:
+            self._completed_rows.extend({
+                "cloudlet_id": c.cloudlet_id,
+                "file_size": c.file_size,
+                "vm": c.assigned_vm,
+                "waiting_time": c.waiting_time,
+                "execution_time": c.execution_time,
+                "total_time": c.get_total_time()
+            } for c in completed[len(self._completed_rows):])
+            return list(self._completed_rows)
 
     def get_statistics(self):
         """Get overall statistics"""
@@ -94,7 +104,6 @@ class SimulationController:
 
     def start_simulation(self):
         """Start the simulation"""
-        import threading
         simulation_thread = threading.Thread(
             target=self.datacenter.run_simulation,
             args=(3600,),  # Run for 1 hour
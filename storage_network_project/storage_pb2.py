@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rstorage.proto\x12\x07storage\"]\n\x0ePrepareRequest\x12\x0f\n\x07\x66ile_id\x18\x01 \x01(\t\x12\x11\n\tfile_name\x18\x02 \x01(\t\x12\x11\n\tfile_size\x18\x03 \x01(\x03\x12\x14\n\x0ctotal_chunks\x18\x04 \x01(\x05\"1\n\x0fPrepareResponse\x12\r\n\x05ready\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"W\n\x0c\x43hunkRequest\x12\x0f\n\x07\x66ile_id\x18\x01 \x01(\t\x12\x10\n\x08\x63hunk_id\x18\x02 \x01(\x05\x12\x12\n\nchunk_data\x18\x03 \x01(\x0c\x12\x10\n\x08\x63hecksum\x18\x04 \x01(\t\">\n\rChunkResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0b\n\x03\x61\x63k\x18\x02 \x01(\x05\x12\x0f\n\x07node_id\x18\x03 \x01(\t\" \n\rStatusRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\"z\n\x0eStatusResponse\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x14\n\x0cstorage_used\x18\x03 \x01(\x03\x12\x18\n\x10storage_capacity\x18\x04 \x01(\x03\x12\x17\n\x0fstorage_percent\x18\x05 \x01(\x01\x32\xd8\x01\n\x13\x46ileTransferService\x12\x43\n\x0ePrepareReceive\x12\x17.storage.PrepareRequest\x1a\x18.storage.PrepareResponse\x12>\n\rTransferChunk\x12\x15.storage.ChunkRequest\x1a\x16.storage.ChunkResponse\x12<\n\tGetStatus\x12\x16.storage.StatusRequest\x1a\x17.storage.StatusResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rstorage.proto\x12\x07storage\"]\n\x0ePrepareRequest\x12\x0f\n\x07\x66ile_id\x18\x01 \x01(\t\x12\x11\n\tfile_name\x18\x02 \x01(\t\x12\x11\n\tfile_size\x18\x03 \x01(\x03\x12\x14\n\x0ctotal_chunks\x18\x04 \x01(\x05\"1\n\x0fPrepareResponse\x12\r\n\x05ready\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"W\n\x0c\x43hunkRequest\x12\x0f\n\x07\x66ile_id\x18\x01 \x01(\t\x12\x10\n\x08\x63hunk_id\x18\x02 \x01(\x05\x12\x12\n\nchunk_data\x18\x03 \x01(\x0c\x12\x10\n\x08\x63hecksum\x18\x04 \x01(\x07\">\n\rChunkResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0b\n\x03\x61\x63k\x18\x02 \x01(\x05\x12\x0f\n\x07node_id\x18\x03 \x01(\t\"r\n\x0c\x43hunkSummary\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x17\n\x0f\x63hunks_received\x18\x02 \x01(\x05\x12\x16\n\x0e\x62ytes_received\x18\x03 \x01(\x03\x12\x0f\n\x07node_id\x18\x04 \x01(\t\x12\x0f\n\x07message\x18\x05 \x01(\t\" \n\rStatusRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\"z\n\x0eStatusResponse\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x14\n\x0cstorage_used\x18\x03 \x01(\x03\x12\x18\n\x10storage_capacity\x18\x04 \x01(\x03\x12\x17\n\x0fstorage_percent\x18\x05 \x01(\x01\x32\x9a\x02\n\x13\x46ileTransferService\x12\x43\n\x0ePrepareReceive\x12\x17.storage.PrepareRequest\x1a\x18.storage.PrepareResponse\x12>\n\rTransferChunk\x12\x15.storage.ChunkRequest\x1a\x16.storage.ChunkResponse\x12@\n\x0eTransferChunks\x12\x15.storage.ChunkRequest\x1a\x15.storage.ChunkSummary(\x01\x12<\n\tGetStatus\x12\x16.storage.StatusRequest\x1a\x17.storage.StatusResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -39,10 +39,12 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_CHUNKREQUEST']._serialized_end=259
   _globals['_CHUNKRESPONSE']._serialized_start=261
   _globals['_CHUNKRESPONSE']._serialized_end=323
-  _globals['_STATUSREQUEST']._serialized_start=325
-  _globals['_STATUSREQUEST']._serialized_end=357
-  _globals['_STATUSRESPONSE']._serialized_start=359
-  _globals['_STATUSRESPONSE']._serialized_end=481
-  _globals['_FILETRANSFERSERVICE']._serialized_start=484
-  _globals['_FILETRANSFERSERVICE']._serialized_end=700
+  _globals['_CHUNKSUMMARY']._serialized_start=325
+  _globals['_CHUNKSUMMARY']._serialized_end=439
+  _globals['_STATUSREQUEST']._serialized_start=441
+  _globals['_STATUSREQUEST']._serialized_end=473
+  _globals['_STATUSRESPONSE']._serialized_start=475
+  _globals['_STATUSRESPONSE']._serialized_end=597
+  _globals['_FILETRANSFERSERVICE']._serialized_start=600
+  _globals['_FILETRANSFERSERVICE']._serialized_end=882
 # @@protoc_insertion_point(module_scope)
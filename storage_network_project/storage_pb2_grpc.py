@@ -44,6 +44,11 @@ class FileTransferServiceStub(object):
                 request_serializer=storage__pb2.ChunkRequest.SerializeToString,
                 response_deserializer=storage__pb2.ChunkResponse.FromString,
                 _registered_method=True)
+        self.TransferChunks = channel.stream_unary(
+                '/storage.FileTransferService/TransferChunks',
+                request_serializer=storage__pb2.ChunkRequest.SerializeToString,
+                response_deserializer=storage__pb2.ChunkSummary.FromString,
+                _registered_method=True)
         self.GetStatus = channel.unary_unary(
                 '/storage.FileTransferService/GetStatus',
                 request_serializer=storage__pb2.StatusRequest.SerializeToString,
@@ -66,6 +71,12 @@ class FileTransferServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def TransferChunks(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetStatus(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -85,6 +96,11 @@ def add_FileTransferServiceServicer_to_server(servicer, server):
                     request_deserializer=storage__pb2.ChunkRequest.FromString,
                     response_serializer=storage__pb2.ChunkResponse.SerializeToString,
             ),
+            'TransferChunks': grpc.stream_unary_rpc_method_handler(
+                    servicer.TransferChunks,
+                    request_deserializer=storage__pb2.ChunkRequest.FromString,
+                    response_serializer=storage__pb2.ChunkSummary.SerializeToString,
+            ),
             'GetStatus': grpc.unary_unary_rpc_method_handler(
                     servicer.GetStatus,
                     request_deserializer=storage__pb2.StatusRequest.FromString,
@@ -155,6 +171,33 @@ class FileTransferService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def TransferChunks(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/storage.FileTransferService/TransferChunks',
+            storage__pb2.ChunkRequest.SerializeToString,
+            storage__pb2.ChunkSummary.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetStatus(request,
             target,
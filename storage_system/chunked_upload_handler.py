@@ -4,7 +4,7 @@ Handles large file uploads by splitting them into chunks
 """
 import os
 import hashlib
-import json
+import orjson
 from pathlib import Path
 from typing import Dict, List, Optional
 import threading
@@ -28,15 +28,15 @@ class ChunkedUploadHandler:
     def _load_metadata(self):
         """Load upload metadata from disk"""
         if self.metadata_path.exists():
-            with open(self.metadata_path, 'r') as f:
-                self.active_uploads = json.load(f)
+            with open(self.metadata_path, 'rb') as f:
+                self.active_uploads = orjson.loads(f.read())
         else:
             self.active_uploads = {}
 
     def _save_metadata(self):
         """Save upload metadata to disk"""
-        with open(self.metadata_path, 'w') as f:
-            json.dump(self.active_uploads, f, indent=2)
+        with open(self.metadata_path, 'wb') as f:
+            f.write(orjson.dumps(self.active_uploads))
 
     def initiate_upload(self, filename: str, total_size: int, file_hash: str,
                        user_id: str, category: str = "general") -> Dict:
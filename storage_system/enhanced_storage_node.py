@@ -1,8 +1,9 @@
 import time
 import json
-from typing import Dict, List, Optional
+from functools import partial
+from typing import BinaryIO, Dict, List, Optional
 from pathlib import Path
-from .vhd_manager import VHDManager
+from .vhd_manager import VHDManager, VHDFileReader
 
 class StorageNode:
     """Enhanced storage node with real file storage and networking"""
@@ -64,6 +65,48 @@ class StorageNode:
         self.total_requests += 1
         return result
 
+    def _user_vhd_id(self, user_id: str) -> Optional[str]:
+        """Find the VHD holding a user's storage (named after the user by create_user_storage)"""
+        for vhd in self.vhd_manager.list_vhds():
+            if vhd.get('user_id') == user_id or vhd.get('name') == user_id:
+                return vhd['vhd_id']
+        return None
+
+    def upload_file_stream(self, user_id: str, file_name: str, stream: BinaryIO,
+                           chunk_size: int = 1024 * 1024) -> Dict:
+        """Upload a file from a file-like object, copying it in fixed-size chunks"""
+        vhd_id = self._user_vhd_id(user_id)
+
+        if not vhd_id:
+            return {
+                "status": "error",
+                "message": f"VHD not found for user {user_id}"
+            }
+
+        # The writer enforces the VHD's free space and hashes as it goes
+        try:
+            with self.vhd_manager.open_writer(vhd_id, file_name, user_id=user_id) as writer:
+                for chunk in iter(partial(stream.read, chunk_size), b''):
+                    writer.write(chunk)
+                file_metadata = writer.finalize()
+        except ValueError as e:
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+
+        self.total_uploads += 1
+        self.total_bytes_transferred += file_metadata['size']
+        self.total_requests += 1
+        print(f"⬆️  Uploaded '{file_name}' ({file_metadata['size']} bytes) for user '{user_id}'")
+
+        return {
+            "status": "success",
+            "message": "File stored successfully",
+            "file_id": file_metadata['file_id'],
+            "file_metadata": file_metadata
+        }
+
     def download_file(self, user_id: str, file_id: str) -> Optional[Dict]:
         """Download a file from user's storage"""
         file_data = self.vhd_manager.retrieve_file(user_id, file_id)
@@ -80,6 +123,25 @@ class StorageNode:
         self.total_requests += 1
         return file_data
 
+    def open_file_reader(self, user_id: str, file_id: str) -> Optional[VHDFileReader]:
+        """Open a streaming reader over a user's file, without reading it into memory"""
+        vhd_id = self._user_vhd_id(user_id)
+        self.total_requests += 1
+
+        if not vhd_id:
+            return None
+
+        try:
+            reader = self.vhd_manager.open_reader(vhd_id, file_id, user_id=user_id)
+        except ValueError:
+            return None
+
+        self.total_downloads += 1
+        self.total_bytes_transferred += reader.size
+        print(f"⬇️  Downloaded '{reader.filename}' for user '{user_id}'")
+
+        return reader
+
     def list_user_files(self, user_id: str) -> List[Dict]:
         """List all files for a user"""
         return self.vhd_manager.list_files(user_id)
@@ -3,14 +3,29 @@ Network Node Communication System
 Handles node discovery, communication, and file replication across network
 """
 import socket
-import json
+import orjson
 import threading
 import time
 import requests
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import hashlib
 
+# Shared pool for replica uploads; they are network-bound, so threads overlap the waits
+_replication_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="replicate")
+
+# Shared keep-alive connection pool for node-to-node HTTP
+_http = requests.Session()
+_http.mount('http://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+_http.headers['Connection'] = 'keep-alive'
+
 class NetworkNode:
     """
     Represents a storage node in the distributed network
@@ -49,27 +64,27 @@ class NetworkNode:
     def _load_registry(self) -> Dict:
         """Load known nodes from registry"""
         if self.registry_file.exists():
-            with open(self.registry_file, 'r') as f:
-                return json.load(f)
+            with open(self.registry_file, 'rb') as f:
+                return orjson.loads(f.read())
         return {}
 
     def _save_registry(self):
         """Save node registry"""
-        with open(self.registry_file, 'w') as f:
-            json.dump(self.known_nodes, f, indent=2)
+        with open(self.registry_file, 'wb') as f:
+            f.write(orjson.dumps(self.known_nodes))
 
     def _load_file_index(self):
         """Load file index for this node"""
         index_file = self.storage_path / "file_index.json"
         if index_file.exists():
-            with open(index_file, 'r') as f:
-                self.file_index = json.load(f)
+            with open(index_file, 'rb') as f:
+                self.file_index = orjson.loads(f.read())
 
     def _save_file_index(self):
         """Save file index"""
         index_file = self.storage_path / "file_index.json"
-        with open(index_file, 'w') as f:
-            json.dump(self.file_index, f, indent=2)
+        with open(index_file, 'wb') as f:
+            f.write(orjson.dumps(self.file_index))
 
     def register_node(self, node_info: Dict) -> bool:
         """Register a new node in the network"""
@@ -99,25 +114,31 @@ class NetworkNode:
             with open(file_path, 'wb') as f:
                 f.write(file_data)
 
-            self.file_index[file_id] = {
-                **file_metadata,
-                "stored_at": time.time(),
-                "file_path": str(file_path),
-                "size": len(file_data),
-                "checksum": hashlib.sha256(file_data).hexdigest()
-            }
-
-            self._save_file_index()
-            self.stats['files_stored'] += 1
-            self.stats['total_size'] += len(file_data)
-
-            print(f"[OK] File stored: {file_metadata.get('filename', file_id)} ({len(file_data)} bytes)")
+            self._index_file(file_id, file_metadata, file_path,
+                             len(file_data), hashlib.sha256(file_data).hexdigest())
             return True
 
         except Exception as e:
             print(f"✗ Error storing file: {e}")
             return False
 
+    def _index_file(self, file_id: str, file_metadata: Dict, file_path: Path,
+                    size: int, checksum: str):
+        """Record a file already written to this node's storage"""
+        self.file_index[file_id] = {
+            **file_metadata,
+            "stored_at": time.time(),
+            "file_path": str(file_path),
+            "size": size,
+            "checksum": checksum
+        }
+
+        self._save_file_index()
+        self.stats['files_stored'] += 1
+        self.stats['total_size'] += size
+
+        print(f"[OK] File stored: {file_metadata.get('filename', file_id)} ({size} bytes)")
+
     def retrieve_file(self, file_id: str) -> Optional[bytes]:
         """Retrieve a file from this node"""
         if file_id not in self.file_index:
@@ -158,17 +179,25 @@ class NetworkNode:
         if not file_data:
             return False
 
+        return self._send_replica(file_id, target_node_id, self._replica_payload(file_id, file_data))
+
+    def _replica_payload(self, file_id: str, file_data: bytes) -> Dict:
+        """Build the /api/node/store request body for a file"""
+        return {
+            "file_id": file_id,
+            "file_data": file_data.hex(),
+            "metadata": self.file_index[file_id]
+        }
+
+    def _send_replica(self, file_id: str, target_node_id: str, payload: Dict) -> bool:
+        """POST a prepared replica to another node"""
         file_metadata = self.file_index[file_id]
         target_node = self.known_nodes[target_node_id]
 
         try:
-            response = requests.post(
+            response = _http.post(
                 f"http://{target_node['ip_address']}:{target_node['port']}/api/node/store",
-                json={
-                    "file_id": file_id,
-                    "file_data": file_data.hex(),
-                    "metadata": file_metadata
-                },
+                json=payload,
                 timeout=30
             )
 
@@ -185,7 +214,7 @@ class NetworkNode:
             return False
 
     def auto_replicate(self, file_id: str, replication_factor: int = 2) -> List[str]:
-        """Automatically replicate a file to N other nodes"""
+        """Automatically replicate a file to N other nodes, in parallel"""
         active_nodes = [
             node_id for node_id, info in self.known_nodes.items()
             if info['status'] == 'active'
@@ -195,15 +224,26 @@ class NetworkNode:
             print(f"⚠ Warning: Only {len(active_nodes)} active nodes available")
             replication_factor = len(active_nodes)
 
-        replicated_to = []
+        targets = active_nodes[:replication_factor]
+        if not targets:
+            return []
+
+        if file_id not in self.file_index:
+            print(f"✗ File not found: {file_id}")
+            return []
+
+        # Read and encode once, then send to every target at the same time
+        file_data = self.retrieve_file(file_id)
+        if not file_data:
+            return []
+        payload = self._replica_payload(file_id, file_data)
 
-        for i in range(replication_factor):
-            if i < len(active_nodes):
-                target_node_id = active_nodes[i]
-                if self.replicate_file_to_node(file_id, target_node_id):
-                    replicated_to.append(target_node_id)
+        futures = [
+            (target_node_id, _replication_pool.submit(self._send_replica, file_id, target_node_id, payload))
+            for target_node_id in targets
+        ]
 
-        return replicated_to
+        return [target_node_id for target_node_id, future in futures if future.result()]
 
     def get_node_info(self) -> Dict:
         """Get this node's information"""
@@ -233,6 +273,50 @@ class NetworkNode:
         print(f"[OK] Node stopped: {self.node_id}")
 
 
+class ReplicationStream:
+    """
+    Streams a file onto the primary node chunk by chunk,
+    then replicates it to other nodes once complete
+    """
+
+    def __init__(self, cluster: 'NodeCluster', file_id: str,
+                 replication_factor: int = 2):
+        self.cluster = cluster
+        self.node = cluster.nodes[cluster.primary_node_id]
+        self.file_id = file_id
+        self.replication_factor = replication_factor
+        self.file_path = self.node.storage_path / f"{file_id}.bin"
+        self.size = 0
+        self._file = open(self.file_path, 'wb')
+
+    def send(self, chunk: bytes):
+        """Forward a chunk of file data to the primary node"""
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def finish(self, file_metadata: Dict) -> Dict:
+        """
+        Index the file on the primary node and replicate it
+        The checksum is taken from file_metadata['hash'] (the writer already hashed the stream)
+        """
+        self._file.close()
+        self.node._index_file(self.file_id, file_metadata, self.file_path,
+                              self.size, file_metadata['hash'])
+
+        replicated_to = self.node.auto_replicate(self.file_id, self.replication_factor)
+
+        return {
+            "success": True,
+            "primary_node": self.node.node_id,
+            "replicated_to": replicated_to,
+            "total_copies": len(replicated_to) + 1
+        }
+
+    def abort(self):
+        """Discard a partially streamed file"""
+        self._file.close()
+        self.file_path.unlink(missing_ok=True)
+
 class NodeCluster:
     """Manages a cluster of nodes"""
 
@@ -240,6 +324,10 @@ class NodeCluster:
         self.nodes: Dict[str, NetworkNode] = {}
         self.primary_node_id = None
 
+        # Dashboards poll get_cluster_status() in bursts; reuse it briefly
+        self.status_cache_ttl = 1.5
+        self._status_cache: Optional[Tuple[float, Dict]] = None
+
     def add_node(self, node: NetworkNode):
         """Add a node to the cluster"""
         self.nodes[node.node_id] = node
@@ -247,6 +335,8 @@ class NodeCluster:
         if self.primary_node_id is None:
             self.primary_node_id = node.node_id
 
+        self.invalidate_cluster_status()
+
     def create_and_add_node(self, node_id: str, ip_address: str,
                            port: int) -> NetworkNode:
         """Create and add a new node"""
@@ -270,9 +360,20 @@ class NodeCluster:
         for node in self.nodes.values():
             node.start()
 
+        self.invalidate_cluster_status()
+
+    def invalidate_cluster_status(self):
+        """Drop the cached cluster status"""
+        self._status_cache = None
+
     def get_cluster_status(self) -> Dict:
-        """Get status of entire cluster"""
-        return {
+        """Get status of entire cluster (cached for status_cache_ttl seconds)"""
+        now = time.monotonic()
+        cached = self._status_cache
+        if cached and now - cached[0] < self.status_cache_ttl:
+            return cached[1]
+
+        status = {
             "total_nodes": len(self.nodes),
             "active_nodes": sum(1 for n in self.nodes.values() if n.status == 'active'),
             "primary_node": self.primary_node_id,
@@ -282,6 +383,17 @@ class NodeCluster:
             }
         }
 
+        self._status_cache = (now, status)
+        return status
+
+    def begin_replication(self, file_id: str,
+                          replication_factor: int = 2) -> Optional[ReplicationStream]:
+        """Start streaming a file to the primary node (None if there is no primary)"""
+        if not self.primary_node_id or self.primary_node_id not in self.nodes:
+            return None
+
+        return ReplicationStream(self, file_id, replication_factor)
+
     def store_file_with_replication(self, file_id: str, file_data: bytes,
                                    file_metadata: Dict,
                                    replication_factor: int = 2) -> Dict:
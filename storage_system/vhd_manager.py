@@ -3,12 +3,158 @@ Complete Virtual Hard Disk (VHD) Manager
 Creates and manages virtual hard disks for cloud storage
 """
 import os
-import json
+import orjson
 import hashlib
+import threading
 import time
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import struct
+from collections import OrderedDict
+
+class VHDFileWriter:
+    """
+    Streams a single file into a VHD chunk by chunk
+    Use via VHDManager.open_writer(); nothing is recorded until finalize()
+    """
+
+    def __init__(self, manager: 'VHDManager', vhd_id: str, file_path: str,
+                 user_id: str = None, max_size: int = None):
+        if vhd_id not in manager.vhd_registry:
+            raise ValueError(f"VHD {vhd_id} not found")
+
+        self.manager = manager
+        self.vhd_id = vhd_id
+        self.file_path = file_path
+        self.user_id = user_id
+        self.max_size = max_size
+        self.file_id = hashlib.sha256(f"{file_path}{time.time()}".encode()).hexdigest()
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._lock = manager._get_write_lock(vhd_id)
+        self._file = None
+
+    def __enter__(self):
+        # One writer per VHD at a time: files are laid out back to back
+        self._lock.acquire()
+        try:
+            vhd_info = self.manager.vhd_registry[self.vhd_id]
+            self.offset = 2048 + vhd_info['used_space']  # Skip VHD headers
+            self._free = vhd_info['size_bytes'] - vhd_info['used_space']
+            # Unbuffered: chunks are already large, so skip the extra copy
+            # through a BufferedWriter and hand them straight to write(2)
+            self._file = open(vhd_info['path'], 'r+b', buffering=0)
+            self._file.seek(self.offset)
+        except Exception:
+            self._lock.release()
+            raise
+        return self
+
+    def write(self, chunk: bytes):
+        """Append a chunk of file data"""
+        new_size = self.size + len(chunk)
+        if self.max_size is not None and new_size > self.max_size:
+            raise ValueError("Storage quota exceeded")
+        if new_size > self._free:
+            raise ValueError("VHD full - insufficient space")
+
+        view = memoryview(chunk)
+        while view:
+            written = self._file.write(view)
+            view = view[written:]
+        self._hash.update(chunk)
+        self.size = new_size
+
+    def finalize(self) -> Dict:
+        """Record the written file in the FAT and return its metadata"""
+        file_metadata = {
+            "file_id": self.file_id,
+            "filename": os.path.basename(self.file_path),
+            "path": self.file_path,
+            "size": self.size,
+            "offset": self.offset,
+            "vhd_id": self.vhd_id,
+            "user_id": self.user_id,
+            "created_at": time.time(),
+            "hash": self._hash.hexdigest()
+        }
+
+        manager = self.manager
+
+        # Update file allocation table
+        if self.vhd_id not in manager.file_allocation:
+            manager.file_allocation[self.vhd_id] = {}
+        manager.file_allocation[self.vhd_id][self.file_id] = file_metadata
+        manager._save_fat()
+
+        # Update VHD usage
+        vhd_info = manager.vhd_registry[self.vhd_id]
+        vhd_info['used_space'] += self.size
+        vhd_info['file_count'] += 1
+        manager._save_registry()
+
+        print(f"✓ File written to VHD: {self.file_path} ({self.size} bytes)")
+        return file_metadata
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        self._lock.release()
+        return False
+
+class VHDFileReader:
+    """
+    Read-only stream over one file stored inside a VHD
+    The hash is checked as the last byte is read
+    """
+
+    def __init__(self, vhd_path: Path, file_metadata: Dict):
+        self.size = file_metadata['size']
+        self.filename = file_metadata['filename']
+        self._expected_hash = file_metadata['hash']
+        self._hash = hashlib.sha256()
+        self._remaining = self.size
+        self._verified = False
+        self._file = open(vhd_path, 'rb')
+        self._file.seek(file_metadata['offset'])
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes (all remaining bytes if size < 0)"""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        self._hash.update(data)
+
+        if len(data) < size:
+            raise ValueError("File integrity check failed - data truncated")
+        if not self._remaining and not self._verified:
+            if self._hash.hexdigest() != self._expected_hash:
+                raise ValueError("File integrity check failed - data corrupted")
+            self._verified = True
+
+        return data
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024):
+        """Yield the file in chunks, closing the reader when done"""
+        try:
+            while True:
+                chunk = self.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
 
 class VHDManager:
     """
@@ -35,29 +181,44 @@ class VHDManager:
         self.fat_file = self.storage_path / "file_allocation.json"
         self.file_allocation = self._load_fat()
 
+        # Per-VHD write locks (see VHDFileWriter)
+        self._write_locks: Dict[str, threading.Lock] = {}
+        self._write_locks_guard = threading.Lock()
+
+        # Byte-bounded LRU of recently read files: (vhd_id, file_id) -> bytes
+        self.file_cache_max_bytes = 512 * 1024 * 1024
+        self._file_cache: OrderedDict = OrderedDict()
+        self._file_cache_bytes = 0
+        self._file_cache_lock = threading.Lock()
+
     def _load_registry(self) -> Dict:
         """Load VHD registry from disk"""
         if self.registry_file.exists():
-            with open(self.registry_file, 'r') as f:
-                return json.load(f)
+            with open(self.registry_file, 'rb') as f:
+                return orjson.loads(f.read())
         return {}
 
     def _save_registry(self):
         """Save VHD registry to disk"""
-        with open(self.registry_file, 'w') as f:
-            json.dump(self.vhd_registry, f, indent=2)
+        with open(self.registry_file, 'wb') as f:
+            f.write(orjson.dumps(self.vhd_registry))
 
     def _load_fat(self) -> Dict:
         """Load File Allocation Table"""
         if self.fat_file.exists():
-            with open(self.fat_file, 'r') as f:
-                return json.load(f)
+            with open(self.fat_file, 'rb') as f:
+                return orjson.loads(f.read())
         return {}
 
     def _save_fat(self):
         """Save File Allocation Table"""
-        with open(self.fat_file, 'w') as f:
-            json.dump(self.file_allocation, f, indent=2)
+        with open(self.fat_file, 'wb') as f:
+            f.write(orjson.dumps(self.file_allocation))
+
+    def _get_write_lock(self, vhd_id: str) -> threading.Lock:
+        """Get the lock serializing writes into a VHD"""
+        with self._write_locks_guard:
+            return self._write_locks.setdefault(vhd_id, threading.Lock())
 
     def create_vhd(self, vhd_name: str, size_gb: int = 1,
                    vhd_type: str = "dynamic", user_id: str = None) -> Dict:
@@ -275,111 +436,121 @@ class VHDManager:
         Returns:
             File metadata
         """
-        if vhd_id not in self.vhd_registry:
-            raise ValueError(f"VHD {vhd_id} not found")
+        with self.open_writer(vhd_id, file_path, user_id) as writer:
+            writer.write(file_data)
+            return writer.finalize()
 
-        vhd_info = self.vhd_registry[vhd_id]
-        vhd_path = Path(vhd_info['path'])
-
-        # Check space
-        file_size = len(file_data)
-        if vhd_info['used_space'] + file_size > vhd_info['size_bytes']:
-            raise ValueError("VHD full - insufficient space")
+    def open_writer(self, vhd_id: str, file_path: str, user_id: str = None,
+                    max_size: int = None) -> VHDFileWriter:
+        """
+        Open a streaming writer for a new file in a VHD
 
-        # Generate file ID
-        file_id = hashlib.sha256(f"{file_path}{time.time()}".encode()).hexdigest()
+        Args:
+            vhd_id: VHD identifier
+            file_path: Virtual path in VHD (e.g., /documents/file.pdf)
+            user_id: User ID for ownership
+            max_size: Optional byte limit on top of the VHD's free space
 
-        # Calculate offset for file data
-        # Store files sequentially after VHD headers
-        offset = 2048 + vhd_info['used_space']  # Skip VHD headers
+        Returns:
+            Context manager with write(chunk) and finalize() -> file metadata
+        """
+        return VHDFileWriter(self, vhd_id, file_path, user_id, max_size)
 
-        # Write file data
-        with open(vhd_path, 'r+b') as f:
-            f.seek(offset)
-            f.write(file_data)
+    def read_file_from_vhd(self, vhd_id: str, file_id: str) -> bytes:
+        """
+        Read a file from VHD
 
-        # Create file metadata
-        file_metadata = {
-            "file_id": file_id,
-            "filename": os.path.basename(file_path),
-            "path": file_path,
-            "size": file_size,
-            "offset": offset,
-            "vhd_id": vhd_id,
-            "user_id": user_id,
-            "created_at": time.time(),
-            "hash": hashlib.sha256(file_data).hexdigest()
-        }
+        Args:
+            vhd_id: VHD identifier
+            file_id: File identifier
 
-        # Update file allocation table
-        if vhd_id not in self.file_allocation:
-            self.file_allocation[vhd_id] = {}
-        self.file_allocation[vhd_id][file_id] = file_metadata
-        self._save_fat()
+        Returns:
+            File binary data
+        """
+        with self.open_reader(vhd_id, file_id) as reader:
+            return reader.read()
+
+    def get_file_bytes(self, vhd_id: str, file_id: str) -> bytes:
+        """Read a whole file, served from the in-memory LRU when possible"""
+        key = (vhd_id, file_id)
+        with self._file_cache_lock:
+            file_data = self._file_cache.get(key)
+            if file_data is not None:
+                self._file_cache.move_to_end(key)
+                return file_data
+
+        file_data = self.read_file_from_vhd(vhd_id, file_id)
+
+        # Don't let a single large file flush everything else out
+        if len(file_data) <= self.file_cache_max_bytes // 4:
+            with self._file_cache_lock:
+                if key not in self._file_cache:
+                    self._file_cache[key] = file_data
+                    self._file_cache_bytes += len(file_data)
+                while self._file_cache_bytes > self.file_cache_max_bytes:
+                    _, evicted = self._file_cache.popitem(last=False)
+                    self._file_cache_bytes -= len(evicted)
 
-        # Update VHD usage
-        vhd_info['used_space'] += file_size
-        vhd_info['file_count'] += 1
-        self._save_registry()
+        return file_data
 
-        print(f"✓ File written to VHD: {file_path} ({file_size} bytes)")
-        return file_metadata
+    def _uncache_file(self, vhd_id: str, file_id: str):
+        """Drop a file from the in-memory LRU"""
+        with self._file_cache_lock:
+            file_data = self._file_cache.pop((vhd_id, file_id), None)
+            if file_data is not None:
+                self._file_cache_bytes -= len(file_data)
 
-    def read_file_from_vhd(self, vhd_id: str, file_id: str) -> bytes:
+    def open_reader(self, vhd_id: str, file_id: str,
+                    user_id: str = None) -> VHDFileReader:
         """
-        Read a file from VHD
+        Open a streaming reader for a file in a VHD
 
         Args:
             vhd_id: VHD identifier
             file_id: File identifier
+            user_id: If given, the file must belong to this user
 
         Returns:
-            File binary data
+            Reader with read(n), close(), size and filename
         """
         if vhd_id not in self.file_allocation:
             raise ValueError(f"No files in VHD {vhd_id}")
 
-        if file_id not in self.file_allocation[vhd_id]:
+        file_metadata = self.get_file_info(vhd_id, file_id)
+        if not file_metadata or (user_id and file_metadata.get('user_id') != user_id):
             raise ValueError(f"File {file_id} not found")
 
-        file_metadata = self.file_allocation[vhd_id][file_id]
-        vhd_info = self.vhd_registry[vhd_id]
-        vhd_path = Path(vhd_info['path'])
-
-        # Read file data
-        with open(vhd_path, 'rb') as f:
-            f.seek(file_metadata['offset'])
-            file_data = f.read(file_metadata['size'])
-
-        # Verify integrity
-        file_hash = hashlib.sha256(file_data).hexdigest()
-        if file_hash != file_metadata['hash']:
-            raise ValueError("File integrity check failed - data corrupted")
-
-        return file_data
-
-    def delete_file_from_vhd(self, vhd_id: str, file_id: str) -> bool:
-        """Delete a file from VHD"""
-        if vhd_id not in self.file_allocation:
-            return False
+        vhd_path = Path(self.vhd_registry[vhd_id]['path'])
+        return VHDFileReader(vhd_path, file_metadata)
 
-        if file_id not in self.file_allocation[vhd_id]:
-            return False
+    def delete_file_from_vhd(self, vhd_id: str, file_id: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Delete a file from VHD
 
-        file_metadata = self.file_allocation[vhd_id][file_id]
+        Returns:
+            (success, metadata of the deleted file); (False, None) if not found
+        """
+        # Same lock as writers, so lookup and removal happen as one step
+        with self._get_write_lock(vhd_id):
+            file_metadata = self.file_allocation.get(vhd_id, {}).pop(file_id, None)
+            if file_metadata is None:
+                return False, None
 
-        # Mark space as free (in production, implement proper space reclamation)
-        vhd_info = self.vhd_registry[vhd_id]
-        vhd_info['used_space'] -= file_metadata['size']
-        vhd_info['file_count'] -= 1
+            # Mark space as free (in production, implement proper space reclamation)
+            vhd_info = self.vhd_registry[vhd_id]
+            vhd_info['used_space'] -= file_metadata['size']
+            vhd_info['file_count'] -= 1
 
-        # Remove from allocation table
-        del self.file_allocation[vhd_id][file_id]
-        self._save_fat()
-        self._save_registry()
+            self._uncache_file(vhd_id, file_id)
+            self._save_fat()
+            self._save_registry()
 
         print(f"✓ File deleted from VHD: {file_metadata['filename']}")
-        return True
+        return True, file_metadata
+
+    def get_file_info(self, vhd_id: str, file_id: str) -> Optional[Dict]:
+        """Get a single file's metadata from the allocation table"""
+        return self.file_allocation.get(vhd_id, {}).get(file_id)
 
     def list_files_in_vhd(self, vhd_id: str, user_id: str = None) -> List[Dict]:
         """List all files in a VHD"""
@@ -407,6 +578,10 @@ class VHDManager:
 
         return vhds
 
+    def count_vhds(self) -> int:
+        """Count registered VHDs"""
+        return len(self.vhd_registry)
+
     def get_usage_stats(self, vhd_id: str) -> Dict:
         """Get usage statistics for a VHD"""
         if vhd_id not in self.vhd_registry:
@@ -30,7 +30,7 @@ if not otp:
 print('Received OTP (for testing):', otp)
 
 print('\n3) Verifying OTP...')
-r = s.post(f'{base}/verify-otp', json={'otp': otp})
+r = s.post(f'{base}/verify-otp', json={'otp': otp, 'otp_ticket': lj.get('otp_ticket')})
 print('verify:', r.status_code, r.text)
 vj = r.json()
 user = vj.get('user')
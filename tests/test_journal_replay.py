@@ -0,0 +1,66 @@
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from auth_system.complete_auth import AuthenticationSystem
+from auth_system.user_manager import UserManager
+
+def _tear_journal(journal_path):
+    """Simulate a crash mid-append: leave half a record at the journal tail"""
+    with open(journal_path, 'ab') as f:
+        f.write(b'{"s":"users","k":"torn@example.com","v":{"ema')
+
+def test_auth_journal_torn_tail():
+    print("=" * 60)
+    print("Testing journal replay with a torn tail")
+    print("=" * 60)
+
+    data_path = tempfile.mkdtemp()
+
+    # First run: register a user, then "crash" with a half-written entry
+    auth = AuthenticationSystem(data_path)
+    auth.register_user("before@example.com", "Password123!", "Before Crash")
+    _tear_journal(auth.journal_path)
+
+    # Second run: replays past the torn line, then keeps writing
+    auth = AuthenticationSystem(data_path)
+    assert "before@example.com" in auth.users
+    auth.register_user("after@example.com", "Password123!", "After Crash")
+
+    # Third run: writes made after the crash must survive
+    auth = AuthenticationSystem(data_path)
+    print(f"   Users after restart: {sorted(auth.users)}")
+    assert "before@example.com" in auth.users
+    assert "after@example.com" in auth.users
+    assert "torn@example.com" not in auth.users
+
+    print("\n✅ Journal replay test complete!")
+
+def test_user_journal_torn_tail():
+    print("=" * 60)
+    print("Testing user journal replay with a torn tail")
+    print("=" * 60)
+
+    users_db = os.path.join(tempfile.mkdtemp(), "users.json")
+
+    user_mgr = UserManager(users_db)
+    user_mgr.register_user("before", "before@example.com", "Password123!")
+    with open(user_mgr.journal_path, 'ab') as f:
+        f.write(b'{"op":"upsert","u":"torn","v":{"ema')
+
+    user_mgr = UserManager(users_db)
+    assert "before" in user_mgr.users
+    user_mgr.register_user("after", "after@example.com", "Password123!")
+
+    user_mgr = UserManager(users_db)
+    print(f"   Users after restart: {sorted(user_mgr.users)}")
+    assert "before" in user_mgr.users
+    assert "after" in user_mgr.users
+    assert "torn" not in user_mgr.users
+
+    print("\n✅ User journal replay test complete!")
+
+if __name__ == '__main__':
+    test_auth_journal_torn_tail()
+    test_user_journal_torn_tail()
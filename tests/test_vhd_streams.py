@@ -0,0 +1,79 @@
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from storage_system.vhd_manager import VHDManager
+
+def _expect_error(message, func, *args):
+    """Run func and check it raises ValueError with the given message"""
+    try:
+        func(*args)
+    except ValueError as e:
+        assert str(e) == message, str(e)
+        print(f"   Raised: {e}")
+        return
+    raise AssertionError(f"expected ValueError: {message}")
+
+def test_vhd_streams():
+    print("=" * 60)
+    print("Testing VHD streaming writer and reader")
+    print("=" * 60)
+
+    vhd = VHDManager(tempfile.mkdtemp())
+    vhd_id = vhd.create_vhd("alice", size_gb=1, user_id="alice")['vhd_id']
+
+    # Test 1: Write in chunks, read back in chunks
+    print("\n1. Write -> read round trip...")
+    test_data = os.urandom(3 * 1024 * 1024 + 17)
+    with vhd.open_writer(vhd_id, "/files/blob.bin", user_id="alice") as writer:
+        for i in range(0, len(test_data), 1024 * 1024):
+            writer.write(test_data[i:i + 1024 * 1024])
+        metadata = writer.finalize()
+    print(f"   Wrote {metadata['size']} bytes as {metadata['file_id'][:12]}...")
+
+    reader = vhd.open_reader(vhd_id, metadata['file_id'], user_id="alice")
+    assert reader.filename == "blob.bin"
+    assert reader.size == len(test_data)
+    assert b''.join(reader.iter_chunks(64 * 1024)) == test_data
+    print("   Read back matches")
+
+    # Test 2: Quota and free-space limits surface from write()
+    print("\n2. Quota and VHD-full errors...")
+    with vhd.open_writer(vhd_id, "/files/quota.bin", max_size=10) as writer:
+        _expect_error("Storage quota exceeded", writer.write, b"x" * 11)
+
+    vhd_info = vhd.get_vhd_info(vhd_id)
+    used_space = vhd_info['used_space']
+    vhd_info['used_space'] = vhd_info['size_bytes'] - 10
+    with vhd.open_writer(vhd_id, "/files/full.bin") as writer:
+        _expect_error("VHD full - insufficient space", writer.write, b"x" * 11)
+    vhd_info['used_space'] = used_space
+    assert len(vhd.list_files_in_vhd(vhd_id)) == 1
+
+    # Test 3: A flipped byte is caught when the last byte is read
+    print("\n3. Corrupted data...")
+    with open(vhd_info['path'], 'r+b') as f:
+        f.seek(metadata['offset'] + 5)
+        byte = f.read(1)
+        f.seek(metadata['offset'] + 5)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    with vhd.open_reader(vhd_id, metadata['file_id']) as reader:
+        reader.read(len(test_data) - 1)
+        _expect_error("File integrity check failed - data corrupted", reader.read)
+
+    # Test 4: Delete, then delete again
+    print("\n4. Deleting file...")
+    deleted, deleted_metadata = vhd.delete_file_from_vhd(vhd_id, metadata['file_id'])
+    assert deleted and deleted_metadata['file_id'] == metadata['file_id']
+    assert vhd.get_vhd_info(vhd_id)['used_space'] == 0
+    assert vhd.delete_file_from_vhd(vhd_id, metadata['file_id']) == (False, None)
+    _expect_error(f"File {metadata['file_id']} not found", vhd.open_reader, vhd_id, metadata['file_id'])
+
+    print("\n✅ VHD stream test complete!")
+
+if __name__ == '__main__':
+    test_vhd_streams()
@@ -1,9 +1,10 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response
 from flask_cors import CORS
+from itsdangerous import TimestampSigner, BadSignature, SignatureExpired
 import sys
 import os
 from pathlib import Path
-import io
+from urllib.parse import quote
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -27,6 +28,13 @@ app = Flask(__name__,
 app.secret_key = 'cloud-storage-secret-key-2024-change-this'
 CORS(app)
 
+# Short-lived signed ticket that carries the username between /login and
+# /verify-otp, so the OTP step needs no server-side session state
+otp_ticket_signer = TimestampSigner(app.secret_key, salt='otp-ticket')
+OTP_TICKET_MAX_AGE = 300  # Matches the OTP validity window
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # Downloads are streamed 1MB at a time
+
 # Initialize systems
 print("\n" + "=" * 70)
 print("[*] Initializing Cloud Storage System...")
@@ -120,12 +128,13 @@ def login():
     result = user_manager.authenticate(username, password, send_email=True)
 
     if result['status'] == 'otp_required':
-        # Store username in session for OTP verification
-        session['pending_username'] = username
+        # Hand back a signed ticket for the OTP step
+        ticket = otp_ticket_signer.sign(username.encode('utf-8')).decode('utf-8')
         return jsonify({
             'status': 'otp_required',
             'message': result['message'],
-            'email': result['email']
+            'email': result['email'],
+            'otp_ticket': ticket
         })
 
     return jsonify(result), 401
@@ -135,9 +144,11 @@ def verify_otp():
     """User login - Step 2: OTP Verification"""
     data = request.json
     otp = data.get('otp')
-    username = session.get('pending_username')
+    ticket = request.headers.get('X-OTP-Ticket') or data.get('otp_ticket')
 
-    if not username:
+    try:
+        username = otp_ticket_signer.unsign(ticket or '', max_age=OTP_TICKET_MAX_AGE).decode('utf-8')
+    except (BadSignature, SignatureExpired):
         return jsonify({
             'status': 'error',
             'message': 'Session expired. Please login again.'
@@ -150,7 +161,6 @@ def verify_otp():
         # Set session
         session['username'] = username
         session['user_id'] = result['user']['user_id']
-        session.pop('pending_username', None)
 
         return jsonify({
             'status': 'success',
@@ -250,12 +260,10 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
 
-    # Read file data
-    file_data = file.read()
     user_id = session['user_id']
 
-    # Upload to storage
-    result = main_node.upload_file(user_id, file.filename, file_data)
+    # Stream to storage in chunks rather than reading the whole upload
+    result = main_node.upload_file_stream(user_id, file.filename, file.stream)
 
     if result['status'] == 'success':
         return jsonify({
@@ -266,6 +274,11 @@ def upload_file():
 
     return jsonify(result), 400
 
+def content_disposition(filename):
+    """Attachment header that survives quotes, CRLF and non-ASCII in the stored name (RFC 5987)"""
+    fallback = ''.join(c if c.isascii() and c.isprintable() and c not in '"\\' else '_' for c in filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
 @app.route('/api/download/<file_id>', methods=['GET'])
 def download_file(file_id):
     """Download a file"""
@@ -273,16 +286,23 @@ def download_file(file_id):
         return jsonify({'error': 'Not authenticated'}), 401
 
     user_id = session['user_id']
-    file_data = main_node.download_file(user_id, file_id)
+    reader = main_node.open_file_reader(user_id, file_id)
 
-    if file_data:
-        return send_file(
-            io.BytesIO(file_data['file_data']),
-            as_attachment=True,
-            download_name=file_data['metadata']['original_name']
-        )
+    if reader is None:
+        return jsonify({'error': 'File not found'}), 404
 
-    return jsonify({'error': 'File not found'}), 404
+    # Files live inside the .vhd container, so stream them out chunk by chunk
+    response = Response(
+        reader.iter_chunks(DOWNLOAD_CHUNK_SIZE),
+        mimetype='application/octet-stream',
+        headers={
+            'Content-Disposition': content_disposition(reader.filename),
+            'Content-Length': str(reader.size)
+        }
+    )
+    # Close even if the client disconnects before streaming starts
+    response.call_on_close(reader.close)
+    return response
 
 @app.route('/api/delete/<file_id>', methods=['DELETE'])
 def delete_file(file_id):
@@ -343,16 +363,3 @@ def replicate_file(file_id):
         })
 
     return jsonify(result), 400
-
-if __name__ == '__main__':
-    print("\n" + "=" * 70)
-    print("[*] Starting Flask Web Server...")
-    print("=" * 70)
-    print("[+] Server: http://127.0.0.1:5000")
-    print("[+] Register: http://127.0.0.1:5000/register")
-    print("[+] Login: http://127.0.0.1:5000/login")
-    print("[+] Nodes: http://127.0.0.1:5000/nodes")
-    print("=" * 70)
-    print("\n[!] Press CTRL+C to stop the server\n")
-
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
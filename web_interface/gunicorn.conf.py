@@ -0,0 +1,21 @@
+"""
+Gunicorn configuration for the web interface
+
+Run from the project root:
+    gunicorn -c web_interface/gunicorn.conf.py web_interface.app:app
+"""
+import os
+
+bind = "0.0.0.0:5000"
+
+# UserManager keeps OTPs, the user journal and the SMTP/mail threads in
+# process memory, so everything must live in a single worker. Concurrency
+# comes from threads; password hashing already fans out to its own
+# process pool, so CPU-bound logins still use every core.
+workers = 1
+worker_class = "gthread"
+threads = 2 * (os.cpu_count() or 1) + 1
+
+# Not preloaded: background threads and the KDF pool started in a master
+# process would not survive the fork into the worker.
+preload_app = False
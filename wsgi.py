@@ -0,0 +1,7 @@
+"""
+WSGI entry point for the complete application
+
+Run with:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import app